@@ -0,0 +1,87 @@
+import sys
+from shutil import get_terminal_size
+
+
+class Renderer:
+    """Console output of the game boards.
+
+    A board is drawn as a list of text lines composed into one buffer and written with
+    a single write(). When the same board is drawn again on a terminal, only the changed
+    characters are rewritten in place with ANSI cursor moves. This needs to know how many
+    lines were printed since the board, so messages and prompts go through write()/input()"""
+
+    def __init__(self, stream=None, diff=None):
+        self._stream = stream
+        self._diff = diff  # None - only if the stream is a terminal
+        self._frames = {}  # board key -> (lines, number of the first line)
+        self._line = 0  # lines written so far
+
+    @property
+    def stream(self):
+        return self._stream if self._stream is not None else sys.stdout
+
+    def _can_diff(self):
+        if self._diff is None:
+            self._diff = self.stream.isatty()
+        return self._diff
+
+    def draw(self, key, lines):
+        """Shows the frame of the board 'key'"""
+        lines = list(lines)
+        previous = self._frames.get(key)
+        if previous is not None and len(previous[0]) == len(lines) and self._can_diff() and \
+                self._line - previous[1] < get_terminal_size().lines:
+            self._write(_patch(previous[0], lines, self._line - previous[1]))
+            self._frames[key] = lines, previous[1]
+            return
+
+        self._frames[key] = lines, self._line
+        self.write('\n'.join(lines) + '\n')
+
+    def write(self, text):
+        self._line += text.count('\n')
+        self._write(text)
+
+    def input(self, prompt=''):
+        self.stream.flush()
+        self._line += 1  # the prompt and the echoed answer
+        return input(prompt)
+
+    def _write(self, text):
+        if text:
+            self.stream.write(text)
+            self.stream.flush()
+
+
+class NullRenderer(Renderer):
+    """Renderer for headless runs: the boards and messages are dropped"""
+
+    def draw(self, key, lines):
+        pass
+
+    def write(self, text):
+        pass
+
+
+def _patch(old, new, up):
+    """ANSI sequence rewriting the changed characters of a frame whose first line is 'up' lines
+    above the cursor; the cursor is returned to the start of its line"""
+    parts = []
+    for i, (old_line, new_line) in enumerate(zip(old, new)):
+        if old_line == new_line:
+            continue
+        parts.append(f'\x1b[{up - i}F')
+        col = 0
+        while col < len(new_line):
+            if col < len(old_line) and old_line[col] == new_line[col]:
+                col += 1
+                continue
+            end = col
+            while end < len(new_line) and (end >= len(old_line) or old_line[end] != new_line[end]):
+                end += 1
+            parts.append(f'\x1b[{col + 1}G{new_line[col:end]}')
+            col = end
+        if len(new_line) < len(old_line):
+            parts.append(f'\x1b[{len(new_line) + 1}G\x1b[K')
+        parts.append(f'\x1b[{up - i}E')
+    return ''.join(parts)
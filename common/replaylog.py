@@ -0,0 +1,164 @@
+import os
+from mmap import mmap, ACCESS_READ
+from struct import Struct
+
+_header = Struct('<4s4sHHH')  # magic, kind of log, move size, state size, moves between checkpoints
+_magic = b'RL01'
+
+# every slot starts with a tag byte
+GAME = b'G'  # first slot of a game, holds its initial state
+MOVE = b'M'
+STATE = b'S'  # first slot of a checkpoint
+MORE = b'+'  # next slot of a state that does not fit into one
+END = b'E'  # end of a game, holds the length of its result and the result
+
+
+class ReplayWriter:
+    """Append-only binary log of games.
+
+    The file is a header and a sequence of fixed-width slots: a tag byte and 'move_size' bytes.
+    A game is its initial state, the moves, a checkpoint of the state after every
+    'checkpoint_every' moves and an end slot. A state always takes the same number of slots,
+    so the position of any move of a game follows from the position of the game itself.
+    Writes go through a buffered file; call close() (or use 'with') to flush them.
+    A slot left unfinished at the end of the file (e.g. by a crash) is cut off before appending"""
+
+    def __init__(self, path, kind, move_size, state_size, checkpoint_every=32, buffer_size=1 << 16):
+        header = _header.pack(_magic, kind, move_size, state_size, checkpoint_every)
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, 'r+b') as f:
+                if f.read(_header.size) != header:
+                    raise ValueError('файл журнала другого формата')
+                size = os.path.getsize(path)
+                f.truncate(size - (size - _header.size) % (move_size + 1))
+            self._file = open(path, 'ab', buffering=buffer_size)
+        else:
+            self._file = open(path, 'wb', buffering=buffer_size)
+            self._file.write(header)
+
+        self._move_size = move_size
+        self._state_size = state_size
+        self._state_slots = -(-state_size // move_size)
+        self._every = checkpoint_every
+        self._snapshot = None
+        self._moves = 0
+
+    def begin(self, state, snapshot=None):
+        """Starts a game; 'state' and the states returned by 'snapshot' for the checkpoints
+        must be exactly 'state_size' bytes"""
+        if self._state_slots and snapshot is None:
+            raise ValueError('для контрольных точек нужна функция состояния')
+        self._snapshot = snapshot
+        self._moves = 0
+        self._write_state(GAME, state)
+
+    def move(self, data):
+        self._write_slot(MOVE, data)
+        self._moves += 1
+        if self._state_slots and self._moves % self._every == 0:
+            self._write_state(STATE, self._snapshot())
+
+    def end(self, result=b''):
+        """Finishes the game; 'result' takes at most move_size - 1 bytes"""
+        if len(result) >= self._move_size:
+            raise ValueError('результат партии не помещается в запись')
+        self._write_slot(END, bytes((len(result),)) + result)
+        self._snapshot = None
+
+    def _write_slot(self, tag, data):
+        self._file.write(tag)
+        self._file.write(data.ljust(self._move_size, b'\0'))
+
+    def _write_state(self, tag, state):
+        if len(state) != self._state_size:
+            raise ValueError('размер состояния не совпадает с форматом журнала')
+        for i in range(max(self._state_slots, 1)):
+            self._write_slot(MORE if i else tag, state[i * self._move_size:(i + 1) * self._move_size])
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ReplayLog:
+    """Read-only view of a log written by ReplayWriter, served from an mmap"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap(f.fileno(), 0, access=ACCESS_READ)
+        magic, self.kind, self.move_size, self.state_size, self.checkpoint_every = _header.unpack_from(self._mmap)
+        if magic != _magic:
+            raise ValueError('неверный формат файла журнала')
+
+        self._slot = self.move_size + 1
+        self._state_slots = -(-self.state_size // self.move_size)
+        slots = (len(self._mmap) - _header.size) // self._slot  # an unfinished last slot is skipped
+        self._tags = self._mmap[_header.size:_header.size + slots * self._slot:self._slot]  # one tag byte per slot
+        self._games = []
+        start = self._tags.find(GAME)
+        while start != -1:
+            self._games.append(start)
+            start = self._tags.find(GAME, start + 1)
+
+    def __len__(self):
+        return len(self._games)
+
+    def _payload(self, slot, slots=1):
+        position = _header.size + slot * self._slot
+        return b''.join(self._mmap[position + i * self._slot + 1:position + (i + 1) * self._slot]
+                        for i in range(slots))
+
+    def _bounds(self, game):
+        start = self._games[game]
+        stop = self._games[game + 1] if game + 1 < len(self._games) else len(self._tags)
+        return start, stop
+
+    def _move_slot(self, start, turn):
+        checkpoints = turn // self.checkpoint_every if self._state_slots else 0
+        return start + max(self._state_slots, 1) + turn + checkpoints * self._state_slots
+
+    def move_count(self, game):
+        return self._tags.count(MOVE, *self._bounds(game))
+
+    def result(self, game):
+        """The result given to ReplayWriter.end(), None if the game was not finished"""
+        start, stop = self._bounds(game)
+        end = self._tags.find(END, start, stop)
+        if end == -1:
+            return None
+        payload = self._payload(end)
+        return payload[1:1 + payload[0]]
+
+    def moves(self, game, first=0, last=None):
+        """Payloads of the moves first..last-1 of the game"""
+        start, _ = self._bounds(game)
+        last = self.move_count(game) if last is None else last
+        return [self._payload(self._move_slot(start, turn)) for turn in range(first, last)]
+
+    def seek(self, game, turn):
+        """The nearest saved state at or before 'turn' moves of the game and the moves after it:
+        (state bytes, [move payloads]). Applying the moves to the state gives the position after 'turn' moves"""
+        if not 0 <= turn <= self.move_count(game):
+            raise ValueError('в партии нет такого хода')
+        start, _ = self._bounds(game)
+        checkpoint = turn // self.checkpoint_every if self._state_slots else 0
+        if checkpoint:
+            slot = self._move_slot(start, checkpoint * self.checkpoint_every - 1) + 1
+        else:
+            slot = start
+        state = self._payload(slot, self._state_slots)[:self.state_size]
+        return state, self.moves(game, checkpoint * self.checkpoint_every, turn)
+
+    def close(self):
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,4 +1,16 @@
+import os
+import sys
 from random import randint
+from struct import Struct
+
+_common = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'common'))
+if _common not in sys.path:
+    sys.path.append(_common)  # модули, общие для всех проектов
+
+from renderer import Renderer
+from replaylog import ReplayWriter
+
+_move_record = Struct('<BBB')  # x, y, player
 
 
 class TicTacToe:
@@ -6,34 +18,45 @@ class TicTacToe:
     HUMAN_X = 1  # крестик (игрок - человек)
     COMPUTER_O = 2  # нолик (игрок - компьютер)
 
-    def __init__(self):
-        self.pole = tuple(tuple(Cell() for _ in range(3)) for i in range(3))
+    DIRECTIONS = (1, 0), (0, 1), (1, 1), (1, -1)
+
+    def __init__(self, size=3, win_length=None, opponent=None, renderer=None, replay=None):
+        self.size = size
+        self.win_length = win_length or min(size, 5)  # сколько в ряд нужно для победы
+        self.pole = tuple(tuple(Cell() for _ in range(size)) for i in range(size))
+        self.opponent = opponent  # стратегия компьютера, None - случайные ходы
+        self.renderer = renderer if renderer is not None else Renderer()
+        self.replay = replay  # ReplayWriter from open_replay(), None - games are not recorded
+        self._filled = 0  # занятые клетки
         self.__is_human_win = False
         self.__is_computer_win = False
         self.__is_draw = False
 
     def clear(self):
-        self.pole = tuple(tuple(Cell() for _ in range(3)) for i in range(3))
+        self.pole = tuple(tuple(Cell() for _ in range(self.size)) for i in range(self.size))
+        self._filled = 0
 
     def init(self):
         self.clear()
         self.is_human_win = False
         self.is_computer_win = False
         self.is_draw = False
+        if self.replay is not None:
+            self.replay.begin(self.replay_state(), self.replay_state)
 
     def check(self, idx):
         if type(idx) != tuple or len(idx) != 2:
             raise IndexError('неверный индекс клетки')
-        if any(not (0 <= x <= 2) for x in idx if type(x) == int):
+        if any(not (0 <= x < self.size) for x in idx if type(x) == int):
             raise IndexError('неверный индекс клетки')
 
     def __getitem__(self, idx):
         self.check(idx)
         x, y = idx
         if isinstance(x, slice):
-            return tuple([self.pole[i][y].value for i in range(3)])
+            return tuple([self.pole[i][y].value for i in range(self.size)])
         elif isinstance(y, slice):
-            return tuple([self.pole[x][i].value for i in range(3)])
+            return tuple([self.pole[x][i].value for i in range(self.size)])
         else:
             return self.pole[x][y].value
 
@@ -43,38 +66,59 @@ class TicTacToe:
         if not self.pole[x][y]:
             raise ValueError('клетка уже занята')
         self.pole[x][y].value = value
-        if value == self.HUMAN_X and self.winner_check(value):
+        if value != self.FREE_CELL:
+            self._filled += 1
+        if value == self.HUMAN_X and self._is_line_through(x, y, value):
             self.is_human_win = True
-        if value == self.COMPUTER_O and self.winner_check(value):
+        if value == self.COMPUTER_O and self._is_line_through(x, y, value):
             self.is_computer_win = True
         self.is_draw_check()
+        if value != self.FREE_CELL:
+            self._record(x, y, value)
 
-    def show(self):
-        for row in self.pole:
-            print(*[item.value for item in row], flush=True)
-        print()
+    def _record(self, x, y, value):
+        if self.replay is not None:
+            self.replay.move(_move_record.pack(x, y, value))
+            if not self:
+                winner = self.HUMAN_X if self.is_human_win else \
+                    self.COMPUTER_O if self.is_computer_win else self.FREE_CELL
+                self.replay.end(bytes((winner,)))
 
-    def winner_check(self, player):
-        for row in self.pole:
-            if all(item.value == player for item in row):
-                return True
+    def replay_state(self):
+        """Size, win length and the masks of both players as bytes"""
+        n = (self.size * self.size + 7) // 8
+        crosses, noughts = self.masks
+        return bytes((self.size, self.win_length)) + crosses.to_bytes(n, 'little') + noughts.to_bytes(n, 'little')
+
+    def show(self):
+        self.renderer.draw(self, [' '.join(str(item.value) for item in row) for row in self.pole] + [''])
 
-        for i in range(3):
-            if all(val == player for val in (row[i].value for row in self.pole)):
+    def _is_line_through(self, x, y, player):
+        """Checks only the four lines through (x, y), at most win_length cells each way"""
+        for dx, dy in self.DIRECTIONS:
+            count = 1
+            for sign in (1, -1):
+                i, j = x + sign * dx, y + sign * dy
+                while count < self.win_length and 0 <= i < self.size and 0 <= j < self.size and \
+                        self.pole[i][j].value == player:
+                    count += 1
+                    i, j = i + sign * dx, j + sign * dy
+            if count >= self.win_length:
                 return True
+        return False
 
-        if all(self.pole[i][i].value == player for i in range(3)):
-            return True
+    def winner_check(self, player):
+        return any(self.pole[x][y].value == player and self._is_line_through(x, y, player)
+                   for x in range(self.size) for y in range(self.size))
 
     def is_draw_check(self):
-        if all(self.pole[x][y].value for x in range(3) for y in
-               range(3)) and self.is_human_win == False and self.is_computer_win == False:
+        if self._filled == self.size * self.size and not self.is_human_win and not self.is_computer_win:
             self.is_draw = True
 
     def human_go(self):
         while True:
-            x, y = map(int, input('Ведите координаты клетки через пробел').split())
-            if not (0 <= x <= 2) or not (0 <= y <= 2):
+            x, y = map(int, self.renderer.input('Ведите координаты клетки через пробел').split())
+            if not (0 <= x < self.size) or not (0 <= y < self.size):
                 continue
             if self[x, y] == self.FREE_CELL:
                 self[x, y] = self.HUMAN_X
@@ -83,9 +127,12 @@ class TicTacToe:
                 continue
 
     def computer_go(self):
+        if self.opponent is not None:
+            self[self.opponent.choose(self, self.COMPUTER_O)] = self.COMPUTER_O
+            return
         while True:
-            x, y = randint(0, 2), randint(0, 2)
-            if not (0 <= x <= 2) or not (0 <= y <= 2):
+            x, y = randint(0, self.size - 1), randint(0, self.size - 1)
+            if not (0 <= x < self.size) or not (0 <= y < self.size):
                 continue
             if self[x, y] == self.FREE_CELL:
                 self[x, y] = self.COMPUTER_O
@@ -93,6 +140,16 @@ class TicTacToe:
             else:
                 continue
 
+    @property
+    def masks(self):
+        """(HUMAN_X mask, COMPUTER_O mask) - cell (x, y) is bit x * size + y"""
+        masks = {self.HUMAN_X: 0, self.COMPUTER_O: 0}
+        for x in range(self.size):
+            for y in range(self.size):
+                if self.pole[x][y].value in masks:
+                    masks[self.pole[x][y].value] |= 1 << (x * self.size + y)
+        return masks[self.HUMAN_X], masks[self.COMPUTER_O]
+
     @property
     def is_human_win(self):
         return self.__is_human_win
@@ -121,6 +178,140 @@ class TicTacToe:
         return not any([self.is_human_win, self.is_computer_win, self.is_draw])
 
 
+def _win_lines(size, win_length):
+    """Bit masks of every win_length-in-a-row segment on a size x size board"""
+    lines = []
+    for x in range(size):
+        for y in range(size):
+            for dx, dy in TicTacToe.DIRECTIONS:
+                if 0 <= x + dx * (win_length - 1) < size and 0 <= y + dy * (win_length - 1) < size:
+                    lines.append(sum(1 << ((x + dx * k) * size + y + dy * k) for k in range(win_length)))
+    return tuple(lines)
+
+
+def _lines_through(lines, cells):
+    """For every cell index - the win lines containing it"""
+    return tuple(tuple(line for line in lines if line >> i & 1) for i in range(cells))
+
+
+class BitTicTacToe(TicTacToe):
+    """The same game with one bit mask per player instead of Cell objects.
+    Cell (x, y) is bit x * size + y; a move is checked only against the lines through it"""
+    _line_tables = {}  # (size, win_length) -> lines_through()
+
+    def __init__(self, size=3, win_length=None, opponent=None, renderer=None, replay=None):
+        self.size = size
+        self.win_length = win_length or min(size, 5)
+        self._lines_through = self.lines_through(size, self.win_length)
+        self._masks = {self.HUMAN_X: 0, self.COMPUTER_O: 0}
+        self._filled = 0
+        self.opponent = opponent
+        self.renderer = renderer if renderer is not None else Renderer()
+        self.replay = replay
+        self.is_human_win = False
+        self.is_computer_win = False
+        self.is_draw = False
+
+    @classmethod
+    def lines_through(cls, size, win_length):
+        """For every cell index of the board - the bit masks of the win lines containing it"""
+        key = size, win_length
+        if key not in cls._line_tables:
+            cls._line_tables[key] = _lines_through(_win_lines(size, win_length), size * size)
+        return cls._line_tables[key]
+
+    def clear(self):
+        self._masks = {self.HUMAN_X: 0, self.COMPUTER_O: 0}
+        self._filled = 0
+
+    def _value(self, x, y):
+        bit = 1 << (x * self.size + y)
+        if self._masks[self.HUMAN_X] & bit:
+            return self.HUMAN_X
+        if self._masks[self.COMPUTER_O] & bit:
+            return self.COMPUTER_O
+        return self.FREE_CELL
+
+    def __getitem__(self, idx):
+        self.check(idx)
+        x, y = idx
+        if isinstance(x, slice):
+            return tuple([self._value(i, y) for i in range(self.size)])
+        elif isinstance(y, slice):
+            return tuple([self._value(x, i) for i in range(self.size)])
+        else:
+            return self._value(x, y)
+
+    def __setitem__(self, idx, value):
+        self.check(idx)
+        x, y = idx
+        i = x * self.size + y
+        if (self._masks[self.HUMAN_X] | self._masks[self.COMPUTER_O]) >> i & 1:
+            raise ValueError('клетка уже занята')
+        if value not in self._masks:
+            return
+        mask = self._masks[value] = self._masks[value] | 1 << i
+        self._filled += 1
+        if any(mask & line == line for line in self._lines_through[i]):
+            if value == self.HUMAN_X:
+                self.is_human_win = True
+            else:
+                self.is_computer_win = True
+        self.is_draw_check()
+        self._record(x, y, value)
+
+    def show(self):
+        self.renderer.draw(self, [' '.join(str(self._value(x, y)) for y in range(self.size))
+                                  for x in range(self.size)] + [''])
+
+    def winner_check(self, player):
+        mask = self._masks[player]
+        return any(mask & line == line for lines in self._lines_through for line in lines)
+
+    @property
+    def masks(self):
+        """(HUMAN_X mask, COMPUTER_O mask)"""
+        return self._masks[self.HUMAN_X], self._masks[self.COMPUTER_O]
+
+    @property
+    def state(self):
+        """Hashable board key"""
+        return self._masks[self.HUMAN_X] | self._masks[self.COMPUTER_O] << self.size * self.size
+
+    def copy(self):
+        game = BitTicTacToe(self.size, self.win_length, self.opponent, self.renderer)
+        game._masks = dict(self._masks)
+        game._filled = self._filled
+        game.is_human_win, game.is_computer_win, game.is_draw = self.is_human_win, self.is_computer_win, self.is_draw
+        return game
+
+
+def open_replay(path, size=3, win_length=None, checkpoint_every=16):
+    """Log for games of this size; pass it as 'replay' to record them"""
+    n = (size * size + 7) // 8
+    return ReplayWriter(path, b'TTT1', _move_record.size, 2 + 2 * n, checkpoint_every)
+
+
+def load_replay(log, game, turn=None):
+    """The position of a logged game after 'turn' moves (the final one by default)"""
+    if turn is None:
+        turn = log.move_count(game)
+    state, moves = log.seek(game, turn)
+    size, win_length = state[0], state[1]
+    n = (size * size + 7) // 8
+    board = BitTicTacToe(size, win_length)
+    board._masks = {board.HUMAN_X: int.from_bytes(state[2:2 + n], 'little'),
+                    board.COMPUTER_O: int.from_bytes(state[2 + n:2 + 2 * n], 'little')}
+    board._filled = bin(board._masks[board.HUMAN_X] | board._masks[board.COMPUTER_O]).count('1')
+    board.is_human_win = board.winner_check(board.HUMAN_X)
+    board.is_computer_win = board.winner_check(board.COMPUTER_O)
+    board.is_draw_check()
+    for move in moves:
+        x, y, player = _move_record.unpack(move)
+        board[x, y] = player
+    return board
+
+
 class Cell:
     def __init__(self):
         self.value = 0
@@ -0,0 +1,138 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from random import Random
+from time import perf_counter
+
+from Game import BitTicTacToe, TicTacToe
+from renderer import NullRenderer
+from strategies import MctsStrategy, PerfectStrategy, RandomStrategy
+
+try:
+    import numpy as np
+except ImportError:  # numpy нужен только для simulate_random_numpy
+    np = None
+
+CHUNK = 2000  # games per job, so the results for a seed do not depend on 'processes'
+
+
+def play_game(x_player, o_player, size=3, win_length=None):
+    """Plays one silent game, crosses first. Returns HUMAN_X, COMPUTER_O or FREE_CELL for a draw"""
+    game = BitTicTacToe(size, win_length, renderer=NullRenderer())
+    player, strategy, other = game.HUMAN_X, x_player, o_player
+    while game:
+        game[strategy.choose(game, player)] = player
+        player = game.COMPUTER_O if player == game.HUMAN_X else game.HUMAN_X
+        strategy, other = other, strategy
+    if game.is_human_win:
+        return game.HUMAN_X
+    if game.is_computer_win:
+        return game.COMPUTER_O
+    return game.FREE_CELL
+
+
+def _play_chunk(job):
+    games, x_factory, o_factory, size, win_length, seed = job
+    rng = Random(seed)
+    x_player, o_player = x_factory(rng=Random(rng.getrandbits(64))), o_factory(rng=Random(rng.getrandbits(64)))
+    counts = [0, 0, 0]  # draws, crosses, noughts - indexed by play_game result
+    for _ in range(games):
+        counts[play_game(x_player, o_player, size, win_length)] += 1
+    return counts
+
+
+def _stats(counts, seconds):
+    games = sum(counts)
+    return {'games': games, 'x_wins': counts[TicTacToe.HUMAN_X], 'o_wins': counts[TicTacToe.COMPUTER_O],
+            'draws': counts[TicTacToe.FREE_CELL], 'x_win_rate': counts[TicTacToe.HUMAN_X] / games if games else 0,
+            'o_win_rate': counts[TicTacToe.COMPUTER_O] / games if games else 0,
+            'draw_rate': counts[TicTacToe.FREE_CELL] / games if games else 0, 'seconds': seconds}
+
+
+def simulate(games, x_factory=RandomStrategy, o_factory=RandomStrategy, size=3, win_length=None, seed=None,
+             processes=1):
+    """Runs 'games' silent games and returns aggregate win/draw statistics.
+
+    x_factory/o_factory build a strategy from an 'rng' keyword (a strategy class or a partial);
+    with processes != 1 the games are split into chunks over a process pool"""
+    started = perf_counter()
+    master = Random(seed)
+    jobs = [(min(CHUNK, games - start), x_factory, o_factory, size, win_length, master.getrandbits(64))
+            for start in range(0, games, CHUNK)]
+
+    if processes == 1:
+        results = map(_play_chunk, jobs)
+        counts = [sum(column) for column in zip(*results)] if jobs else [0, 0, 0]
+    else:
+        with ProcessPoolExecutor(processes) as pool:
+            counts = [sum(column) for column in zip(*pool.map(_play_chunk, jobs))] if jobs else [0, 0, 0]
+
+    return _stats(counts, perf_counter() - started)
+
+
+def _line_cells(size, win_length):
+    """Cell indices of every win line plus, for each cell, the ids of the lines through it.
+    Rows are padded with a dummy line over the extra always-empty cell 'size * size'"""
+    lines = []
+    for x in range(size):
+        for y in range(size):
+            for dx, dy in TicTacToe.DIRECTIONS:
+                if 0 <= x + dx * (win_length - 1) < size and 0 <= y + dy * (win_length - 1) < size:
+                    lines.append([(x + dx * k) * size + y + dy * k for k in range(win_length)])
+    lines.append([size * size] * win_length)
+
+    through = [[i for i, line in enumerate(lines[:-1]) if cell in line] for cell in range(size * size)]
+    width = max(len(ids) for ids in through)
+    through = [ids + [len(lines) - 1] * (width - len(ids)) for ids in through]
+    return np.array(lines, dtype=np.intp), np.array(through, dtype=np.intp)
+
+
+def simulate_random_numpy(games, size=3, win_length=None, seed=None):
+    """Random against random for all games at once: every step makes one move in each
+    unfinished game and checks only the lines through that move"""
+    if np is None:
+        raise RuntimeError('для векторного режима нужен numpy')
+    started = perf_counter()
+    win_length = win_length or min(size, 5)
+    cells = size * size
+    lines, through = _line_cells(size, win_length)
+    rng = np.random.default_rng(seed)
+
+    board = np.zeros((games, cells + 1), dtype=np.int8)
+    result = np.zeros(games, dtype=np.int8)
+    active = np.arange(games)
+    for turn in range(cells):
+        if not active.size:
+            break
+        player = TicTacToe.HUMAN_X if turn % 2 == 0 else TicTacToe.COMPUTER_O
+        priority = rng.random((active.size, cells))
+        priority[board[active, :cells] != TicTacToe.FREE_CELL] = -1
+        moves = priority.argmax(axis=1)
+        board[active, moves] = player
+
+        line_cells = lines[through[moves]]  # games x lines through the move x win_length
+        won = (board[active[:, None, None], line_cells] == player).all(axis=2).any(axis=1)
+        result[active[won]] = player
+        active = active[~won]
+
+    counts = np.bincount(result, minlength=3)
+    return _stats([int(c) for c in counts], perf_counter() - started)
+
+
+if __name__ == '__main__':
+    strategies = {'random': RandomStrategy, 'perfect': PerfectStrategy, 'mcts': MctsStrategy}
+    parser = argparse.ArgumentParser(description='Игра компьютера с самим собой без вывода на экран')
+    parser.add_argument('--games', type=int, default=100000)
+    parser.add_argument('--x', choices=strategies, default='random')
+    parser.add_argument('--o', choices=strategies, default='random')
+    parser.add_argument('--size', type=int, default=3)
+    parser.add_argument('--win-length', type=int)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--numpy', action='store_true', help='векторный режим, только random против random')
+    args = parser.parse_args()
+
+    if args.numpy:
+        print(simulate_random_numpy(args.games, args.size, args.win_length, args.seed))
+    else:
+        print(simulate(args.games, strategies[args.x], strategies[args.o], args.size, args.win_length,
+                       args.seed, args.processes))
@@ -0,0 +1,248 @@
+from concurrent.futures import ProcessPoolExecutor
+from math import log, sqrt
+from random import Random
+from time import perf_counter
+
+from Game import BitTicTacToe, _win_lines
+
+
+def _symmetries():
+    """The 8 symmetries of the 3x3 board as cell permutations: new index -> old index"""
+    result = []
+    for turn in range(4):
+        for mirror in (False, True):
+            cells = []
+            for i in range(9):
+                x, y = divmod(i, 3)
+                if mirror:
+                    y = 2 - y
+                for _ in range(turn):
+                    x, y = y, 2 - x
+                cells.append(x * 3 + y)
+            result.append(cells)
+    return result
+
+
+_LINES_3X3 = _win_lines(3, 3)
+_FULL_3X3 = 0b111111111
+
+# _PERMUTED[s][mask] - 'mask' transformed by symmetry s
+_PERMUTED = tuple(tuple(sum(1 << i for i, old in enumerate(cells) if mask >> old & 1) for mask in range(512))
+                  for cells in _symmetries())
+
+
+def canonical(me, other):
+    """The smallest key of the position among its 8 symmetric images"""
+    return min(table[me] | table[other] << 9 for table in _PERMUTED)
+
+
+class RandomStrategy:
+    """Uniformly random free cell"""
+
+    def __init__(self, rng=None):
+        self._rng = rng or Random()
+
+    def choose(self, game, player):
+        crosses, noughts = game.masks
+        occupied = crosses | noughts
+        free = [i for i in range(game.size * game.size) if not occupied >> i & 1]
+        return divmod(self._rng.choice(free), game.size)
+
+
+class PerfectStrategy:
+    """Perfect 3x3 play from a table of negamax values over canonical positions.
+
+    The table is solved once, at first use, for every reachable position
+    (a few hundred up to symmetry); after that a move is one lookup per free cell.
+    A win scores (free cells + 1), so faster wins and slower losses are preferred"""
+
+    _values = {}  # canonical (player to move, other player) -> negamax value
+
+    def __init__(self, rng=None):
+        self._rng = rng or Random()
+
+    @classmethod
+    def _negamax(cls, me, other):
+        key = canonical(me, other)
+        value = cls._values.get(key)
+        if value is not None:
+            return value
+
+        free = _FULL_3X3 & ~(me | other)
+        if any(other & line == line for line in _LINES_3X3):
+            value = -(bin(free).count('1') + 1)
+        elif not free:
+            value = 0
+        else:
+            value = max(-cls._negamax(other, me | 1 << i) for i in range(9) if free >> i & 1)
+
+        cls._values[key] = value
+        return value
+
+    def choose(self, game, player):
+        """Returns the best (x, y) for 'player' on a 3x3 game exposing bit masks"""
+        if game.size != 3 or game.win_length != 3:
+            raise ValueError('идеальная игра доступна только на поле 3x3')
+        crosses, noughts = game.masks
+        me, other = (crosses, noughts) if player == game.HUMAN_X else (noughts, crosses)
+        free = _FULL_3X3 & ~(me | other)
+
+        moves = [(-self._negamax(other, me | 1 << i), i) for i in range(9) if free >> i & 1]
+        best = max(value for value, _ in moves)
+        i = self._rng.choice([i for value, i in moves if value == best])
+        return divmod(i, 3)
+
+
+class _Node:
+    """MCTS tree node; 'me' is the mask of the player to move, 'wins' count for the player who made 'move'"""
+    __slots__ = ('move', 'parent', 'children', 'untried', 'wins', 'visits', 'result', 'me', 'other')
+
+    def __init__(self, move, parent, me, other, result, cells):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.wins = 0.0
+        self.visits = 0
+        self.result = result  # None - game goes on, 1.0 - 'move' won, 0.5 - draw
+        self.me, self.other = me, other
+        occupied = me | other
+        self.untried = [] if result is not None else [i for i in range(cells) if not occupied >> i & 1]
+
+
+class MctsStrategy:
+    """Monte Carlo tree search (UCT) for boards too large to solve.
+
+    Each move is limited by 'time_limit' seconds and/or 'iterations'. Rollouts play random
+    moves on bit masks in a reused buffer; the subtree of the position reached after
+    the opponent's reply is kept for the next move. With processes > 1 independent
+    searches run in a process pool and their root visit counts are summed"""
+
+    def __init__(self, time_limit=1.0, iterations=None, exploration=1.4, rng=None, processes=1):
+        if time_limit is None and iterations is None:
+            raise ValueError('нужно ограничение по времени или по числу итераций')
+        if iterations is not None and iterations < 1:
+            raise ValueError('число итераций должно быть не меньше 1')
+        if time_limit is not None and time_limit <= 0:
+            raise ValueError('ограничение по времени должно быть больше 0')
+        self._time_limit = time_limit
+        self._iterations = iterations
+        self._exploration = exploration
+        self._rng = rng or Random()
+        self._processes = processes
+        self._pool = None
+        self._root = None
+
+    def choose(self, game, player):
+        crosses, noughts = game.masks
+        me, other = (crosses, noughts) if player == game.HUMAN_X else (noughts, crosses)
+
+        if self._processes > 1:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self._processes)
+            jobs = [(game.size, game.win_length, me, other, self._time_limit, self._iterations,
+                     self._exploration, self._rng.getrandbits(64)) for _ in range(self._processes)]
+            visits = {}
+            for counts in self._pool.map(_root_visits, jobs):
+                for move, count in counts.items():
+                    visits[move] = visits.get(move, 0) + count
+            return divmod(max(visits, key=visits.get), game.size)
+
+        root = self._reused_root(me, other)
+        if root is None:
+            root = _Node(None, None, me, other, None, game.size * game.size)
+        search(root, BitTicTacToe.lines_through(game.size, game.win_length), self._time_limit,
+               self._iterations, self._exploration, self._rng)
+
+        best = max(root.children, key=lambda node: node.visits)
+        best.parent = None
+        self._root = best
+        return divmod(best.move, game.size)
+
+    def _reused_root(self, me, other):
+        """The node of the current position if it is a reply to our previous move"""
+        if self._root is not None:
+            for node in self._root.children:
+                if node.me == me and node.other == other:
+                    node.parent = None
+                    return node
+        return None
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def search(root, lines_through, time_limit, iterations, exploration, rng):
+    cells = len(lines_through)
+    full = (1 << cells) - 1
+    buffer = [0] * cells
+    random = rng.random
+    deadline = perf_counter() + time_limit if time_limit is not None else None
+    done = 0
+
+    # at least one iteration, so that the root always has a child to choose
+    while (iterations is None or done < iterations) and \
+            (deadline is None or done % 32 or not done or perf_counter() < deadline):
+        done += 1
+        node = root
+        while not node.untried and node.children:
+            log_visits = log(node.visits)
+            node = max(node.children, key=lambda child: child.wins / child.visits +
+                       exploration * sqrt(log_visits / child.visits))
+
+        if node.untried:
+            k = int(random() * len(node.untried))
+            move = node.untried[k]
+            node.untried[k] = node.untried[-1]
+            node.untried.pop()
+            mask = node.me | 1 << move
+            if any(mask & line == line for line in lines_through[move]):
+                result = 1.0
+            elif mask | node.other == full:
+                result = 0.5
+            else:
+                result = None
+            child = _Node(move, node, node.other, mask, result, cells)
+            node.children.append(child)
+            node = child
+
+        reward = node.result if node.result is not None else \
+            1.0 - _rollout(node.me, node.other, lines_through, buffer, random)
+
+        while node is not None:
+            node.visits += 1
+            node.wins += reward
+            reward = 1.0 - reward
+            node = node.parent
+
+
+def _rollout(me, other, lines_through, buffer, random):
+    """Random playout; returns 1.0 if the player to move ('me') wins, 0.0 if the other one does, 0.5 for a draw"""
+    occupied = me | other
+    n = 0
+    for i in range(len(lines_through)):
+        if not occupied >> i & 1:
+            buffer[n] = i
+            n += 1
+
+    masks = [me, other]
+    turn = 0
+    while n:
+        k = int(random() * n)
+        move = buffer[k]
+        n -= 1
+        buffer[k] = buffer[n]
+        mask = masks[turn] = masks[turn] | 1 << move
+        if any(mask & line == line for line in lines_through[move]):
+            return 1.0 if turn == 0 else 0.0
+        turn ^= 1
+    return 0.5
+
+
+def _root_visits(job):
+    """Independent search in a worker process; returns {move: visits} of the root children"""
+    size, win_length, me, other, time_limit, iterations, exploration, seed = job
+    root = _Node(None, None, me, other, None, size * size)
+    search(root, BitTicTacToe.lines_through(size, win_length), time_limit, iterations, exploration, Random(seed))
+    return {node.move: node.visits for node in root.children}
@@ -0,0 +1,410 @@
+from collections import OrderedDict
+from heapq import heappop, heappush
+from itertools import count
+
+
+class Vertex:
+    def __init__(self):
+        self._links = []
+
+    @property
+    def links(self):
+        return self._links
+
+class Link:
+    def __init__(self, v1, v2):
+        self._v1 = v1
+        self._v2 = v2
+        self._dist = 1
+        self._graph = None
+
+    @property
+    def v1(self):
+        return self._v1
+
+    @property
+    def v2(self):
+        return self._v2
+
+    @property
+    def dist(self):
+        return self._dist
+
+    @dist.setter
+    def dist(self, value):
+        old_value, self._dist = self._dist, value
+        if self._graph is not None:
+            self._graph._link_changed(self, old_value)
+
+class ShortestPathTree:
+    """Dijkstra search from 'source' that is resumed on demand,
+    so every settled vertex is kept for later queries"""
+
+    def __init__(self, source):
+        self._source = source
+        self._d = {source: (0, None, None)}  # dist, link, vertex
+        self._visited = set()
+        self._plan_to_visit = [(0, 0, source)]  # dist, order, vertex
+        self._order = count(1)
+
+    @property
+    def source(self):
+        return self._source
+
+    def settle(self, v):
+        d, visited, plan_to_visit = self._d, self._visited, self._plan_to_visit
+        while v not in visited and plan_to_visit:
+            dist, _, min_vertex = heappop(plan_to_visit)
+            if min_vertex in visited:
+                continue
+            visited.add(min_vertex)
+
+            for link in min_vertex.links:
+                next_vertex = link.v1 if link.v1 != min_vertex else link.v2
+                if next_vertex in visited:
+                    continue
+                next_dist = dist + link.dist
+                if next_vertex not in d or next_dist < d[next_vertex][0]:
+                    d[next_vertex] = next_dist, link, min_vertex
+                    heappush(plan_to_visit, (next_dist, next(self._order), next_vertex))
+
+        return d
+
+
+class DynamicShortestPathTree:
+    """Complete shortest-path tree from 'source' that is repaired in place when a link
+    is added or re-weighted; only the vertices whose route can change are visited"""
+
+    def __init__(self, source):
+        self._source = source
+        self._d = ShortestPathTree(source).settle(None)  # None is never settled, so the whole component is
+        self._children = {v: set() for v in self._d}
+        for v, (_, _, parent) in self._d.items():
+            if parent is not None:
+                self._children[parent].add(v)
+
+    @property
+    def source(self):
+        return self._source
+
+    @property
+    def d(self):
+        return self._d
+
+    def link_added(self, link):
+        self._decrease(link)
+
+    def link_changed(self, link, old_dist):
+        if link.dist < old_dist:
+            self._decrease(link)
+        elif link.dist > old_dist:
+            self._increase(link)
+
+    def _decrease(self, link):
+        """The link got shorter (or appeared): improve the routes going through it"""
+        order = count()
+        plan_to_visit = []
+        for a, b in ((link.v1, link.v2), (link.v2, link.v1)):
+            if a in self._d:
+                heappush(plan_to_visit, (self._d[a][0] + link.dist, next(order), b, link, a))
+        self._propagate(plan_to_visit, order)
+
+    def _increase(self, link):
+        """The link got longer: only the subtree hanging on it can change.
+        Its vertices are detached and re-attached from the untouched part of the tree"""
+        for a, b in ((link.v1, link.v2), (link.v2, link.v1)):
+            if b in self._d and self._d[b][1] is link and self._d[b][2] is a:
+                break
+        else:
+            return
+
+        affected = [b]
+        for v in affected:
+            affected.extend(self._children[v])
+        self._children[a].discard(b)
+        for v in affected:
+            del self._d[v]
+            self._children[v] = set()
+
+        order = count()
+        plan_to_visit = []
+        for v in affected:
+            for next_link in v.links:
+                u = next_link.v1 if next_link.v1 != v else next_link.v2
+                if u in self._d:
+                    heappush(plan_to_visit, (self._d[u][0] + next_link.dist, next(order), v, next_link, u))
+        self._propagate(plan_to_visit, order)
+
+    def _propagate(self, plan_to_visit, order):
+        d, children = self._d, self._children
+        while plan_to_visit:
+            dist, _, v, link, parent = heappop(plan_to_visit)
+            if v in d and d[v][0] <= dist:
+                continue
+            if v in d:
+                children[d[v][2]].discard(v)
+            d[v] = dist, link, parent
+            children[parent].add(v)
+            children.setdefault(v, set())
+
+            for next_link in v.links:
+                next_vertex = next_link.v1 if next_link.v1 != v else next_link.v2
+                next_dist = dist + next_link.dist
+                if next_vertex not in d or next_dist < d[next_vertex][0]:
+                    heappush(plan_to_visit, (next_dist, next(order), next_vertex, next_link, v))
+
+
+class LinkedGraph:
+    DIJKSTRA = 'dijkstra'
+    BIDIRECTIONAL = 'bidirectional'
+    ALT = 'alt'  # A* with landmarks and the triangle inequality
+
+    def __init__(self, cache_size=16):
+        self._links = []
+        self._vertex = {}  # dict as an insertion-ordered set
+        self._link_index = {}  # frozenset({v1, v2}) -> link
+        self._component_parent = {}  # union-find over the vertices
+        self._component_members = {}  # root -> vertices of its component
+        self._cache_size = cache_size
+        self._cache = OrderedDict()  # source -> ShortestPathTree
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._landmark_count = 4
+        self._landmarks = None  # [{vertex: dist from landmark}]
+        self._dynamic = {}  # source -> DynamicShortestPathTree
+
+    @property
+    def cache_hits(self):
+        return self._cache_hits
+
+    @property
+    def cache_misses(self):
+        return self._cache_misses
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def _invalidate(self):
+        """Drops everything computed from the current links and weights"""
+        self._cache.clear()
+        self._landmarks = None
+
+    def add_vertex(self, v):
+        if v not in self._vertex:
+            self._vertex[v] = None
+            self._component_parent[v] = v
+            self._component_members[v] = [v]
+
+    def _component_root(self, v):
+        parent = self._component_parent
+        while parent[v] is not v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    def _union(self, v1, v2):
+        root_1, root_2 = self._component_root(v1), self._component_root(v2)
+        if root_1 is root_2:
+            return
+        if len(self._component_members[root_1]) < len(self._component_members[root_2]):
+            root_1, root_2 = root_2, root_1
+        self._component_parent[root_2] = root_1
+        self._component_members[root_1].extend(self._component_members.pop(root_2))
+
+    def is_connected(self, v1, v2):
+        if v1 is v2:
+            return True
+        if v1 not in self._vertex or v2 not in self._vertex:
+            return False
+        return self._component_root(v1) is self._component_root(v2)
+
+    def component_size(self, v):
+        return len(self._component_members[self._component_root(v)]) if v in self._vertex else 0
+
+    def component(self, v):
+        """Returns the vertices reachable from v"""
+        return tuple(self._component_members[self._component_root(v)]) if v in self._vertex else ()
+
+    def get_link(self, v1, v2):
+        return self._link_index.get(frozenset((v1, v2)))
+
+    def add_link(self, link):
+        key = frozenset((link.v1, link.v2))
+        if key not in self._link_index:
+            self._link_index[key] = link
+            self._links.append(link)
+            self.add_vertex(link.v1)
+            self.add_vertex(link.v2)
+            link.v1.links.append(link)
+            link.v2.links.append(link)
+            link._graph = self
+            self._union(link.v1, link.v2)
+            self._invalidate()
+            for tree in self._dynamic.values():
+                tree.link_added(link)
+
+    def _link_changed(self, link, old_dist):
+        self._invalidate()
+        for tree in self._dynamic.values():
+            tree.link_changed(link, old_dist)
+
+    def register_source(self, v):
+        """Keeps a complete shortest-path tree from v that follows every link change;
+        find_path from v then only walks it"""
+        if v not in self._dynamic:
+            self._dynamic[v] = DynamicShortestPathTree(v)
+        return self._dynamic[v]
+
+    def unregister_source(self, v):
+        self._dynamic.pop(v, None)
+
+    def shortest_path_tree(self, source):
+        tree = self._cache.get(source)
+        if tree is not None:
+            self._cache_hits += 1
+            self._cache.move_to_end(source)
+            return tree
+
+        self._cache_misses += 1
+        tree = ShortestPathTree(source)
+        if self._cache_size > 0:
+            self._cache[source] = tree
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return tree
+
+    def build_landmarks(self, landmark_count=4):
+        """Precomputes distance tables for ALT search.
+        Landmarks are picked one by one as the vertex farthest from those already chosen"""
+        self._landmark_count = landmark_count
+        self._landmarks = []
+        n = float('inf')
+        v = next(iter(self._vertex), None)
+        while v is not None and len(self._landmarks) < landmark_count:
+            d = ShortestPathTree(v).settle(None)  # None is never settled, so the whole component is
+            self._landmarks.append({u: value[0] for u, value in d.items()})
+            v = max(self._vertex, key=lambda u: min(table.get(u, n) for table in self._landmarks))
+            if any(v in table and table[v] == 0 for table in self._landmarks):
+                break
+        return self._landmarks
+
+    def find_path(self, start_v, stop_v, mode=DIJKSTRA):
+        """Returns (vertices, links) of a shortest route or None if stop_v is unreachable"""
+        if mode not in (self.DIJKSTRA, self.BIDIRECTIONAL, self.ALT):
+            raise ValueError('неизвестный режим поиска')
+        if not self.is_connected(start_v, stop_v):
+            return None
+
+        if mode == self.DIJKSTRA:
+            if start_v in self._dynamic:
+                d = self._dynamic[start_v].d
+            else:
+                d = self.shortest_path_tree(start_v).settle(stop_v)
+            vertexs, links = _walk(d, stop_v)
+            vertexs.reverse()
+            links.reverse()
+            return vertexs, links
+        if mode == self.BIDIRECTIONAL:
+            return self._find_path_bidirectional(start_v, stop_v)
+        return self._find_path_alt(start_v, stop_v)
+
+    def _find_path_bidirectional(self, start_v, stop_v):
+        d = {start_v: (0, None, None)}, {stop_v: (0, None, None)}  # forward, backward
+        visited = set(), set()
+        plan_to_visit = [(0, 0, start_v)], [(0, 0, stop_v)]
+        order = count(1)
+        best, meet = (0, start_v) if start_v is stop_v else (float('inf'), None)
+
+        while plan_to_visit[0] and plan_to_visit[1]:
+            if plan_to_visit[0][0][0] + plan_to_visit[1][0][0] >= best:
+                break
+            side = 0 if plan_to_visit[0][0][0] <= plan_to_visit[1][0][0] else 1
+            dist, _, min_vertex = heappop(plan_to_visit[side])
+            if min_vertex in visited[side]:
+                continue
+            visited[side].add(min_vertex)
+
+            for link in min_vertex.links:
+                next_vertex = link.v1 if link.v1 != min_vertex else link.v2
+                if next_vertex in visited[side]:
+                    continue
+                next_dist = dist + link.dist
+                if next_vertex not in d[side] or next_dist < d[side][next_vertex][0]:
+                    d[side][next_vertex] = next_dist, link, min_vertex
+                    heappush(plan_to_visit[side], (next_dist, next(order), next_vertex))
+                if next_vertex in d[1 - side] and d[side][next_vertex][0] + d[1 - side][next_vertex][0] < best:
+                    best = d[side][next_vertex][0] + d[1 - side][next_vertex][0]
+                    meet = next_vertex
+
+        vertexs, links = _walk(d[0], meet)
+        vertexs.reverse()
+        links.reverse()
+        tail_vertexs, tail_links = _walk(d[1], meet)
+        return vertexs + tail_vertexs[1:], links + tail_links
+
+    def _find_path_alt(self, start_v, stop_v):
+        if self._landmarks is None:
+            self.build_landmarks(self._landmark_count)
+        bounds = [(table, table[stop_v]) for table in self._landmarks if stop_v in table]
+        potential = {}
+
+        def h(v):
+            if v not in potential:
+                potential[v] = max((abs(to_stop - table[v]) for table, to_stop in bounds if v in table), default=0)
+            return potential[v]
+
+        d = {start_v: (0, None, None)}
+        visited = set()
+        plan_to_visit = [(h(start_v), 0, start_v)]  # dist + potential, order, vertex
+        order = count(1)
+
+        while plan_to_visit:
+            _, _, min_vertex = heappop(plan_to_visit)
+            if min_vertex in visited:
+                continue
+            visited.add(min_vertex)
+            if min_vertex is stop_v:
+                break
+
+            for link in min_vertex.links:
+                next_vertex = link.v1 if link.v1 != min_vertex else link.v2
+                if next_vertex in visited:
+                    continue
+                next_dist = d[min_vertex][0] + link.dist
+                if next_vertex not in d or next_dist < d[next_vertex][0]:
+                    d[next_vertex] = next_dist, link, min_vertex
+                    heappush(plan_to_visit, (next_dist + h(next_vertex), next(order), next_vertex))
+
+        vertexs, links = _walk(d, stop_v)
+        vertexs.reverse()
+        links.reverse()
+        return vertexs, links
+
+
+def _walk(d, v):
+    """Follows the parents stored in 'd' from v back to the root of the search"""
+    vertexs = [v]
+    links = []
+    last = d[v]
+    while last[2] is not None:
+        links.append(last[1])
+        vertexs.append(last[2])
+        last = d[last[2]]
+    return vertexs, links
+
+
+class Station(Vertex):
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return self.name
+
+class LinkMetro(Link):
+    def __init__(self, v1, v2, dist):
+        super().__init__(v1, v2)
+        self.dist = dist
@@ -0,0 +1,200 @@
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heappop, heappush
+from os import cpu_count
+
+
+class CompactGraph:
+    """Frozen compressed-sparse-row snapshot of a LinkedGraph.
+
+    Vertex i owns the slots offsets[i]:offsets[i + 1] of targets (neighbour id),
+    weights (link dist) and edges (index of the original link)."""
+
+    __slots__ = ('_stations', '_index', '_links', '_offsets', '_targets', '_weights', '_edges')
+
+    def __init__(self, graph):
+        stations = list(graph._vertex)
+        index = {v: i for i, v in enumerate(stations)}
+        links = list(graph._links)
+
+        offsets = array('i', [0]) * (len(stations) + 1)
+        for link in links:
+            offsets[index[link.v1] + 1] += 1
+            offsets[index[link.v2] + 1] += 1
+        for i in range(len(stations)):
+            offsets[i + 1] += offsets[i]
+
+        size = offsets[-1]
+        targets = array('i', [0]) * size
+        weights = array('d', [0.0]) * size
+        edges = array('i', [0]) * size
+        cursor = offsets[:-1]
+        for edge, link in enumerate(links):
+            a, b = index[link.v1], index[link.v2]
+            for u, v in ((a, b), (b, a)):
+                slot = cursor[u]
+                targets[slot] = v
+                weights[slot] = link.dist
+                edges[slot] = edge
+                cursor[u] += 1
+
+        self._stations = stations
+        self._index = index
+        self._links = links
+        self._offsets = offsets
+        self._targets = targets
+        self._weights = weights
+        self._edges = edges
+
+    def __len__(self):
+        return len(self._stations)
+
+    @property
+    def offsets(self):
+        return self._offsets
+
+    @property
+    def targets(self):
+        return self._targets
+
+    @property
+    def weights(self):
+        return self._weights
+
+    @property
+    def edges(self):
+        return self._edges
+
+    def vertex_id(self, v):
+        return self._index[v]
+
+    def station(self, i):
+        return self._stations[i]
+
+    def search(self, source, targets=()):
+        """Dijkstra over the arrays from vertex id 'source', stopped once all 'targets' are settled.
+        Returns (dist, parent, via) lists indexed by vertex id"""
+        return dijkstra(self._offsets, self._targets, self._weights, self._edges, source, targets)
+
+    def find_path(self, start_v, stop_v):
+        start, stop = self._index[start_v], self._index[stop_v]
+        dist, parent, via = self.search(stop, (start,))
+        if dist[start] == float('inf'):
+            return None
+
+        vertexs = [start_v]
+        links = []
+        u = start
+        while parent[u] != -1:
+            links.append(self._links[via[u]])
+            u = parent[u]
+            vertexs.append(self._stations[u])
+
+        return vertexs, links
+
+    def _run(self, jobs, processes):
+        """Runs (source, targets, with_paths) jobs inline or spread over a process pool.
+        Workers receive only the arrays, never the Station/Link objects"""
+        if processes == 1 or len(jobs) < 2:
+            arrays = self._offsets, self._targets, self._weights, self._edges
+            return [_solve(arrays, *job) for job in jobs]
+
+        with self.pool(processes) as pool:
+            chunksize = max(1, len(jobs) // ((processes or cpu_count() or 1) * 4))
+            return list(pool.map(solve_in_worker, jobs, chunksize=chunksize))
+
+    def pool(self, processes=None):
+        """Process pool whose workers hold a copy of the arrays for solve_in_worker jobs"""
+        return ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                   initargs=(self._offsets, self._targets, self._weights, self._edges))
+
+    def route(self, solved_route):
+        """Maps (dist, vertex ids, edge ids) from a search job back to (vertices, links)"""
+        _, vertex_ids, edge_ids = solved_route
+        if vertex_ids is None:
+            return None
+        return [self._stations[i] for i in vertex_ids], [self._links[i] for i in edge_ids]
+
+    def find_paths(self, pairs, processes=1):
+        """Finds a path for every (start_v, stop_v) pair with one search per distinct start_v.
+        Returns (vertices, links) per pair in the same order, or None if stop_v is unreachable.
+        processes=None uses a pool of os.cpu_count() workers"""
+        pairs = list(pairs)
+        groups = {}
+        for start_v, stop_v in pairs:
+            groups.setdefault(self._index[start_v], set()).add(self._index[stop_v])
+
+        jobs = [(source, tuple(targets), True) for source, targets in groups.items()]
+        routes = {}
+        for source, solved in zip(groups, self._run(jobs, processes)):
+            for target, solved_route in solved.items():
+                routes[source, target] = solved_route
+
+        return [self.route(routes[self._index[start_v], self._index[stop_v]]) for start_v, stop_v in pairs]
+
+    def distance_matrix(self, sources, targets, processes=1):
+        """Returns matrix[i][j] - the shortest distance from sources[i] to targets[j] (inf if unreachable)"""
+        target_ids = tuple(self._index[v] for v in targets)
+        jobs = [(self._index[v], target_ids, False) for v in sources]
+        return [[solved[t][0] for t in target_ids] for solved in self._run(jobs, processes)]
+
+
+def dijkstra(offsets, targets, weights, edges, source, stop_at=()):
+    n = float('inf')
+    dist = [n] * (len(offsets) - 1)
+    parent = [-1] * (len(offsets) - 1)
+    via = [-1] * (len(offsets) - 1)
+    dist[source] = 0
+    remaining = set(stop_at)
+    plan_to_visit = [(0, source)]
+
+    while plan_to_visit:
+        d, u = heappop(plan_to_visit)
+        if d > dist[u]:
+            continue
+        remaining.discard(u)
+        if stop_at and not remaining:
+            break
+        for slot in range(offsets[u], offsets[u + 1]):
+            v = targets[slot]
+            next_dist = d + weights[slot]
+            if next_dist < dist[v]:
+                dist[v] = next_dist
+                parent[v] = u
+                via[v] = edges[slot]
+                heappush(plan_to_visit, (next_dist, v))
+
+    return dist, parent, via
+
+
+def _solve(arrays, source, targets, with_paths):
+    """One search from 'source'; returns {target: (dist, vertex ids, edge ids)} with paths
+    running from source to target, or None for both when the target is unreachable"""
+    dist, parent, via = dijkstra(*arrays, source, targets)
+    solved = {}
+    for target in targets:
+        vertex_ids = edge_ids = None
+        if with_paths and dist[target] != float('inf'):
+            vertex_ids, edge_ids = [target], []
+            u = target
+            while parent[u] != -1:
+                edge_ids.append(via[u])
+                u = parent[u]
+                vertex_ids.append(u)
+            vertex_ids.reverse()
+            edge_ids.reverse()
+        solved[target] = dist[target], vertex_ids, edge_ids
+    return solved
+
+
+_worker_arrays = None
+
+
+def _init_worker(*arrays):
+    global _worker_arrays
+    _worker_arrays = arrays
+
+
+def solve_in_worker(job):
+    """Runs a (source, targets, with_paths) job in a worker of CompactGraph.pool()"""
+    return _solve(_worker_arrays, *job)
@@ -0,0 +1,213 @@
+from array import array
+from heapq import heappop, heappush
+from struct import Struct
+
+
+class ContractionHierarchy:
+    """Contraction hierarchy preprocessed from a static LinkedGraph.
+
+    Vertex ids follow the insertion order of the graph. For every vertex only the
+    'upward' links to higher ranked neighbours are kept in CSR form; a link is either
+    an original one (edges[slot] is the index of the link in the graph) or a shortcut
+    over the contracted vertex middles[slot]."""
+
+    _header = Struct('<4sii')  # magic, vertex count, upward slot count
+    _magic = b'CH01'
+
+    def __init__(self, graph, witness_limit=100):
+        self._bind(graph)
+        if graph is not None:
+            self._contract(witness_limit)
+
+    def _bind(self, graph):
+        self._stations = list(graph._vertex) if graph is not None else []
+        self._index = {v: i for i, v in enumerate(self._stations)}
+        self._links = list(graph._links) if graph is not None else []
+
+    def _contract(self, witness_limit):
+        index = self._index
+        adj = [{} for _ in self._stations]  # neighbour -> (dist, middle, edge)
+        for edge, link in enumerate(self._links):
+            a, b = index[link.v1], index[link.v2]
+            if a != b and (b not in adj[a] or link.dist < adj[a][b][0]):
+                adj[a][b] = adj[b][a] = link.dist, -1, edge
+
+        rank = [-1] * len(adj)
+        up = [None] * len(adj)
+        deleted = [0] * len(adj)
+        plan_to_contract = [(self._priority(adj, v, deleted, witness_limit), v) for v in range(len(adj))]
+        plan_to_contract.sort()
+
+        order = 0
+        while plan_to_contract:
+            _, v = heappop(plan_to_contract)
+            priority = self._priority(adj, v, deleted, witness_limit)
+            if plan_to_contract and priority > plan_to_contract[0][0]:
+                heappush(plan_to_contract, (priority, v))
+                continue
+
+            for u, w, dist in self._shortcuts(adj, v, witness_limit):
+                if w not in adj[u] or dist < adj[u][w][0]:
+                    adj[u][w] = adj[w][u] = dist, v, -1
+            for u in adj[v]:
+                del adj[u][v]
+                deleted[u] += 1
+            up[v] = adj[v]
+            adj[v] = {}
+            rank[v] = order
+            order += 1
+
+        offsets = array('i', [0]) * (len(up) + 1)
+        for v, neighbours in enumerate(up):
+            offsets[v + 1] = offsets[v] + len(neighbours)
+        targets = array('i')
+        weights = array('d')
+        middles = array('i')
+        edges = array('i')
+        for neighbours in up:
+            for u, (dist, middle, edge) in neighbours.items():
+                targets.append(u)
+                weights.append(dist)
+                middles.append(middle)
+                edges.append(edge)
+
+        self._rank = array('i', rank)
+        self._offsets, self._targets, self._weights = offsets, targets, weights
+        self._middles, self._edges = middles, edges
+
+    def _shortcuts(self, adj, v, witness_limit):
+        """Returns the shortcuts (u, w, dist) needed to keep distances when v is contracted"""
+        neighbours = list(adj[v].items())
+        result = []
+        for i, (u, (dist_u, _, _)) in enumerate(neighbours[:-1]):
+            rest = neighbours[i + 1:]
+            limit = dist_u + max(value[0] for _, value in rest)
+            witness = self._witness_search(adj, u, v, limit, witness_limit)
+            for w, (dist_w, _, _) in rest:
+                if witness.get(w, float('inf')) > dist_u + dist_w:
+                    result.append((u, w, dist_u + dist_w))
+        return result
+
+    @staticmethod
+    def _witness_search(adj, source, avoid, limit, witness_limit):
+        """Local Dijkstra that skips 'avoid' and gives up past 'limit' or 'witness_limit' settled vertices"""
+        d = {source: 0}
+        visited = set()
+        plan_to_visit = [(0, source)]
+        while plan_to_visit and len(visited) < witness_limit:
+            dist, u = heappop(plan_to_visit)
+            if u in visited:
+                continue
+            if dist > limit:
+                break
+            visited.add(u)
+            for w, (link_dist, _, _) in adj[u].items():
+                if w == avoid:
+                    continue
+                next_dist = dist + link_dist
+                if next_dist < d.get(w, float('inf')):
+                    d[w] = next_dist
+                    heappush(plan_to_visit, (next_dist, w))
+        return d
+
+    def _priority(self, adj, v, deleted, witness_limit):
+        """Edge difference plus the number of already contracted neighbours"""
+        return len(self._shortcuts(adj, v, witness_limit)) - len(adj[v]) + deleted[v]
+
+    def find_path(self, start_v, stop_v):
+        start, stop = self._index[start_v], self._index[stop_v]
+        d = {start: (0, -1)}, {stop: (0, -1)}  # dist, parent
+        visited = set(), set()
+        plan_to_visit = [(0, start)], [(0, stop)]
+        best, meet = float('inf'), -1
+
+        while plan_to_visit[0] or plan_to_visit[1]:
+            for side in (0, 1):
+                plan = plan_to_visit[side]
+                if plan and plan[0][0] >= best:
+                    plan.clear()
+                if not plan:
+                    continue
+                dist, u = heappop(plan)
+                if u in visited[side]:
+                    continue
+                visited[side].add(u)
+                if u in d[1 - side] and dist + d[1 - side][u][0] < best:
+                    best, meet = dist + d[1 - side][u][0], u
+
+                for slot in range(self._offsets[u], self._offsets[u + 1]):
+                    v = self._targets[slot]
+                    next_dist = dist + self._weights[slot]
+                    if v not in d[side] or next_dist < d[side][v][0]:
+                        d[side][v] = next_dist, u
+                        heappush(plan, (next_dist, v))
+
+        if meet == -1:
+            return None
+
+        chain = [meet]
+        while d[0][chain[0]][1] != -1:
+            chain.insert(0, d[0][chain[0]][1])
+        while d[1][chain[-1]][1] != -1:
+            chain.append(d[1][chain[-1]][1])
+
+        vertexs = [start_v]
+        links = []
+        for a, b in zip(chain, chain[1:]):
+            for edge in self._unpack(a, b):
+                link = self._links[edge]
+                links.append(link)
+                vertexs.append(link.v1 if link.v2 is vertexs[-1] else link.v2)
+
+        return vertexs, links
+
+    def _slot(self, low, high):
+        for slot in range(self._offsets[low], self._offsets[low + 1]):
+            if self._targets[slot] == high:
+                return slot
+
+    def _unpack(self, a, b):
+        """Expands the upward link between a and b into original edge ids ordered from a to b"""
+        edges = []
+        plan_to_unpack = [(a, b)]
+        while plan_to_unpack:
+            a, b = plan_to_unpack.pop()
+            low, high = (a, b) if self._rank[a] < self._rank[b] else (b, a)
+            slot = self._slot(low, high)
+            middle = self._middles[slot]
+            if middle == -1:
+                edges.append(self._edges[slot])
+            else:
+                plan_to_unpack.append((middle, b))
+                plan_to_unpack.append((a, middle))
+        return edges
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self._header.pack(self._magic, len(self._rank), len(self._targets)))
+            for data in (self._rank, self._offsets, self._targets, self._weights, self._middles, self._edges):
+                data.tofile(f)
+
+    @classmethod
+    def load(cls, path, graph):
+        """Reads a hierarchy written by save() and binds it to the graph it was built from"""
+        hierarchy = cls(None)
+        with open(path, 'rb') as f:
+            magic, n, m = cls._header.unpack(f.read(cls._header.size))
+            if magic != cls._magic:
+                raise ValueError('неверный формат файла иерархии')
+            hierarchy._rank = array('i')
+            hierarchy._offsets = array('i')
+            hierarchy._targets = array('i')
+            hierarchy._weights = array('d')
+            hierarchy._middles = array('i')
+            hierarchy._edges = array('i')
+            hierarchy._rank.fromfile(f, n)
+            hierarchy._offsets.fromfile(f, n + 1)
+            for data in (hierarchy._targets, hierarchy._weights, hierarchy._middles, hierarchy._edges):
+                data.fromfile(f, m)
+
+        if n != len(graph._vertex) or max(hierarchy._edges, default=-1) >= len(graph._links):
+            raise ValueError('иерархия построена для другого графа')
+        hierarchy._bind(graph)
+        return hierarchy
@@ -0,0 +1,121 @@
+import csv
+from array import array
+from mmap import mmap, ACCESS_READ
+from struct import Struct
+
+from Graph import LinkedGraph, Station, LinkMetro
+from compact import CompactGraph, dijkstra
+
+_header = Struct('<4siiq')  # magic, vertex count, slot count, size of the names blob
+_magic = b'LG01'
+
+
+def read_links(path, delimiter=None, header=True):
+    """Yields (station, station, dist) rows one by one; .tsv files are tab separated"""
+    if delimiter is None:
+        delimiter = '\t' if str(path).endswith('.tsv') else ','
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = csv.reader(f, delimiter=delimiter)
+        if header:
+            next(rows, None)
+        for row in rows:
+            if row:
+                yield row[0], row[1], float(row[2])
+
+
+def load_graph(path, graph=None, delimiter=None, header=True):
+    """Builds (or extends) a LinkedGraph from an edge list, creating a Station per distinct name"""
+    graph = LinkedGraph() if graph is None else graph
+    stations = {str(v): v for v in graph._vertex}
+    for name_1, name_2, dist in read_links(path, delimiter, header):
+        v1 = stations.get(name_1) or stations.setdefault(name_1, Station(name_1))
+        v2 = stations.get(name_2) or stations.setdefault(name_2, Station(name_2))
+        graph.add_link(LinkMetro(v1, v2, dist))
+    return graph
+
+
+def _pad(f):
+    f.write(bytes(-f.tell() % 8))
+
+
+def save_binary(graph, path):
+    """Writes the CSR arrays and station names of a LinkedGraph or CompactGraph
+    in the layout read by MappedGraph"""
+    compact = graph if isinstance(graph, CompactGraph) else CompactGraph(graph)
+    names = [str(compact.station(i)).encode('utf-8') for i in range(len(compact))]
+    name_offsets = array('q', [0]) * (len(names) + 1)
+    for i, name in enumerate(names):
+        name_offsets[i + 1] = name_offsets[i] + len(name)
+
+    with open(path, 'wb') as f:
+        f.write(_header.pack(_magic, len(compact), len(compact.targets), name_offsets[-1]))
+        for data in (compact.weights, name_offsets, compact.offsets, compact.targets, compact.edges):
+            _pad(f)
+            data.tofile(f)
+        _pad(f)
+        for name in names:
+            f.write(name)
+
+
+class MappedGraph:
+    """Read-only graph served straight from a file written by save_binary.
+
+    The arrays are memoryviews over a shared mmap, so opening is O(1) and
+    every process mapping the same file shares its pages."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap(f.fileno(), 0, access=ACCESS_READ)
+        magic, n, m, names_size = _header.unpack_from(self._mmap)
+        if magic != _magic:
+            raise ValueError('неверный формат файла графа')
+
+        view = memoryview(self._mmap)
+        position = _header.size
+        arrays = []
+        for code, count in (('d', m), ('q', n + 1), ('i', n + 1), ('i', m), ('i', m)):
+            position += -position % 8
+            size = count * array(code).itemsize
+            arrays.append(view[position:position + size].cast(code))
+            position += size
+        position += -position % 8
+
+        self._weights, self._name_offsets, self._offsets, self._targets, self._edges = arrays
+        self._names = view[position:position + names_size]
+        self._index = None
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def name(self, i):
+        return bytes(self._names[self._name_offsets[i]:self._name_offsets[i + 1]]).decode('utf-8')
+
+    def vertex_id(self, name):
+        if self._index is None:
+            self._index = {self.name(i): i for i in range(len(self))}
+        return self._index[name]
+
+    def search(self, source, targets=()):
+        return dijkstra(self._offsets, self._targets, self._weights, self._edges, source, targets)
+
+    def find_path(self, start_name, stop_name):
+        """Returns the station names along the shortest route and its length,
+        or None if there is no route"""
+        start, stop = self.vertex_id(start_name), self.vertex_id(stop_name)
+        dist, parent, _ = self.search(stop, (start,))
+        if dist[start] == float('inf'):
+            return None
+
+        names = [start_name]
+        u = start
+        while parent[u] != -1:
+            u = parent[u]
+            names.append(self.name(u))
+
+        return names, dist[start]
+
+    def close(self):
+        self._names.release()
+        for data in (self._weights, self._name_offsets, self._offsets, self._targets, self._edges):
+            data.release()
+        self._mmap.close()
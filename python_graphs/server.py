@@ -0,0 +1,186 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+from collections import OrderedDict, deque
+from struct import Struct
+from time import perf_counter
+
+_common = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'common'))
+if _common not in sys.path:
+    sys.path.append(_common)  # модули, общие для всех проектов
+
+from compact import CompactGraph, solve_in_worker
+from loader import load_graph
+from replaylog import ReplayLog, ReplayWriter
+
+_query_record = Struct('<iidf')  # откуда, куда (номера вершин CompactGraph), расстояние (nan - нет пути), задержка в мс
+
+
+class RouteServer:
+    """Answers route queries by station name over JSON lines.
+
+    Request:  {"id": 1, "from": "Лубянка", "to": "Китай-город 1"} or {"id": 2, "stats": true}
+    Response: {"id": 1, "route": [...names], "dist": 4} ("route": null if there is no route)
+    Searches run in a process pool over a CompactGraph snapshot, answers are kept in an LRU cache.
+    With 'replay' (from open_replay) every answered route is appended to the log, one session per start()"""
+
+    def __init__(self, graph, cache_size=4096, processes=None, latency_window=10000, replay=None):
+        self._compact = CompactGraph(graph)
+        self._stations = {str(v): v for v in graph._vertex}
+        self._processes = processes
+        self._pool = None
+        self._cache_size = cache_size
+        self._cache = OrderedDict()  # (start, stop) -> response fields
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._latency = deque(maxlen=latency_window)
+        self._server = None
+        self._clients = {}  # handler task -> writer
+        self._replay = replay
+
+    async def start(self, host='127.0.0.1', port=8765, path=None):
+        """Listens on a local TCP port or, if 'path' is given, on a Unix socket"""
+        self._pool = self._compact.pool(self._processes)
+        if self._replay is not None:
+            self._replay.begin(b'')
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path=path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            for writer in self._clients.values():
+                writer.close()
+            await asyncio.gather(*self._clients, return_exceptions=True)
+            await self._server.wait_closed()
+        if self._pool is not None:
+            self._pool.shutdown()
+        if self._replay is not None:
+            self._replay.end()
+            self._replay.close()
+
+    async def _handle(self, reader, writer):
+        self._clients[asyncio.current_task()] = writer
+        try:
+            while line := await reader.readline():
+                started = perf_counter()
+                try:
+                    request = json.loads(line)
+                    response = self.stats() if request.get('stats') else await self.route(request['from'], request['to'])
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    request, response = {}, {'error': f'неверный запрос: {e}'}
+                if isinstance(request, dict) and 'id' in request:
+                    response = {'id': request['id'], **response}
+                writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+                await writer.drain()
+                self._latency.append(perf_counter() - started)
+        except ConnectionError:
+            pass
+        finally:
+            del self._clients[asyncio.current_task()]
+            writer.close()
+
+    async def route(self, start_name, stop_name):
+        started = perf_counter()
+        key = start_name, stop_name
+        if key in self._cache:
+            self._cache_hits += 1
+            self._cache.move_to_end(key)
+            self._record(key, self._cache[key], started)
+            return self._cache[key]
+
+        self._cache_misses += 1
+        start_v, stop_v = self._stations.get(start_name), self._stations.get(stop_name)
+        if start_v is None or stop_v is None:
+            return {'error': 'неизвестная станция'}
+
+        source, target = self._compact.vertex_id(start_v), self._compact.vertex_id(stop_v)
+        job = source, (target,), True
+        solved = await asyncio.get_running_loop().run_in_executor(self._pool, solve_in_worker, job)
+        path = self._compact.route(solved[target])
+        if path is None:
+            response = {'route': None}
+        else:
+            response = {'route': [str(v) for v in path[0]], 'dist': sum(link.dist for link in path[1])}
+
+        self._cache[key] = response
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        self._record(key, response, started)
+        return response
+
+    def _record(self, key, response, started):
+        if self._replay is not None:
+            source, target = (self._compact.vertex_id(self._stations[name]) for name in key)
+            dist = response['dist'] if response['route'] is not None else float('nan')
+            self._replay.move(_query_record.pack(source, target, dist, (perf_counter() - started) * 1000))
+
+    def stats(self):
+        """Latency percentiles in milliseconds over the last requests and cache counters"""
+        latency = sorted(self._latency)
+        percentiles = {}
+        for p in (50, 90, 99):
+            percentiles[f'p{p}'] = latency[min(len(latency) - 1, len(latency) * p // 100)] * 1000 if latency else None
+        return {'requests': len(latency), 'latency_ms': percentiles,
+                'cache_hits': self._cache_hits, 'cache_misses': self._cache_misses}
+
+
+def open_replay(path):
+    """Log of the answered routes for RouteServer(replay=...)"""
+    return ReplayWriter(path, b'RTE1', _query_record.size, 0)
+
+
+def read_replay(path):
+    """Yields (source id, target id, dist, latency ms) of every logged route, session by session;
+    the ids are those of CompactGraph over the same edge list"""
+    with ReplayLog(path) as log:
+        for session in range(len(log)):
+            for move in log.moves(session):
+                yield _query_record.unpack(move)
+
+
+async def ask(requests, host='127.0.0.1', port=8765, path=None):
+    """Sends requests over one connection and returns the responses, e.g. for load tests"""
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    responses = []
+    for request in requests:
+        writer.write(json.dumps(request, ensure_ascii=False).encode('utf-8') + b'\n')
+        await writer.drain()
+        responses.append(json.loads(await reader.readline()))
+    writer.close()
+    await writer.wait_closed()
+    return responses
+
+
+async def _serve(args):
+    server = RouteServer(load_graph(args.edges), args.cache_size, args.processes,
+                         replay=open_replay(args.replay) if args.replay else None)
+    await server.start(args.host, args.port, args.unix)
+    print(f'Граф загружен, ожидание запросов на {args.unix or f"{args.host}:{args.port}"}')
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Локальный сервис маршрутов (JSON lines)')
+    parser.add_argument('edges', help='CSV/TSV файл со списком перегонов: станция, станция, расстояние')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='путь к Unix-сокету вместо TCP')
+    parser.add_argument('--cache-size', type=int, default=4096)
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--replay', help='файл журнала запросов')
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -1,6 +1,19 @@
-from random import randint, shuffle
+import os
+import sys
+from random import Random
+from struct import Struct
 from typing import Union
 
+_common = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'common'))
+if _common not in sys.path:
+    sys.path.append(_common)  # модули, общие для всех проектов
+
+from bitboard import BitGrid
+from renderer import Renderer
+from replaylog import ReplayLog, ReplayWriter
+
+_shot_record = Struct('<BBBB')  # стрелок (0 - компьютер, 1 - человек), x, y, результат (0 - мимо, 1 - ранен, 2 - убит)
+
 
 class Ship:
     """Ship representation"""
@@ -73,6 +86,13 @@ class Ship:
         """Getting the initial coordinates of the ship"""
         return self._x, self._y
 
+    def get_cells(self) -> list:
+        """Coordinates of the ship decks in deck order"""
+        x, y = self._x, self._y
+        if self._tp == self.HORIZONTAL:
+            return [(x + i, y) for i in range(self._length)]
+        return [(x, y + i) for i in range(self._length)]
+
     def move(self, go: int):
         """The method implements the movement of the ship in the direction of its orientation to 'go' cells"""
         if self._is_move:
@@ -82,35 +102,18 @@ class Ship:
             elif self._tp == self.VERTICAL:
                 self.set_start_coords(x, y + go)
 
-    @staticmethod
-    def _get_place_and_around_coordinates(ship_orientation: int, ship: 'Ship') -> tuple:
-        """Method for getting the coordinates of the location of the entire ship and
-         coordinates around the ship"""
-        indexes = (-1, 0), (1, 0), (0, 1), (0, -1), (-1, -1), (1, -1), (-1, 1), (1, 1), (0, 0)
-        all_coord = set()
-        ship_coord = set()
-        x, y, length = ship._x, ship._y, ship._length
-
-        if ship_orientation == ship.HORIZONTAL:
-            ship_coord = {(x + j, y) for j in range(length)}
-
-        elif ship_orientation == ship.VERTICAL:
-            ship_coord = {(x, y + i) for i in range(length)}
-
-        for a, b in indexes:
-            for c, d in ship_coord:
-                all_coord.add((a + c, b + d))
-
-        return all_coord, ship_coord
+    def mask(self, grid: BitGrid, dx: int = 0, dy: int = 0) -> int:
+        """Bit mask of the ship decks on 'grid', with the grid origin at (dx, dy)"""
+        start = grid.bit(self._x - dx, self._y - dy)
+        return grid.cover(start, self._length, self._tp == self.HORIZONTAL)
 
     def is_collide(self, ship: 'Ship') -> bool:
         """Method for checking for collision or contact with another 'ship'"""
         if isinstance(ship, Ship):
-            all_coord_self, self_coord = self._get_place_and_around_coordinates(self._tp, self)
-            all_coord_ship, ship_coord = ship._get_place_and_around_coordinates(ship._tp, ship)
-            common_coord = all_coord_self & all_coord_ship
-            result = (self_coord & common_coord) | (ship_coord & common_coord)
-            return len(result) != 0
+            cells = self.get_cells() + ship.get_cells()
+            dx, dy = min(x for x, _ in cells), min(y for _, y in cells)
+            grid = BitGrid(max(max(x - dx, y - dy) for x, y in cells) + 1)
+            return grid.dilate(self.mask(grid, dx, dy)) & ship.mask(grid, dx, dy) != 0
 
     def is_out_pole(self, size: int) -> bool:
         """Method for checking if a ship is out of bounds"""
@@ -136,19 +139,32 @@ class Ship:
 class GamePole:
     """Class for describing the playing field"""
 
-    def __init__(self, size: int = 10):
+    FLEET = (4, 3, 3, 2, 2, 2, 1, 1, 1, 1)  # длины кораблей по умолчанию
+
+    def __init__(self, size: int = 10, fleet: tuple = FLEET, rng: Random = None, renderer: Renderer = None):
         self._size = size
+        self._fleet = fleet
+        self._rng = rng or Random()
+        self.renderer = renderer if renderer is not None else Renderer()
+        self._grid = BitGrid(size)
         self._ships = []
-        self._field = [[0] * self._size for _ in range(self._size)]
         self._name = ''
-        self._count_dead_ships = 0
+        self.rival = None  # поле соперника, по которому стреляет владелец этого поля
+        self._ships_lost = 0  # потопленные корабли этого поля
+        self._ships_mask = 0  # клетки палуб
+        self._hits = 0  # выстрелы, попавшие в палубу
+        self._misses = 0  # выстрелы мимо
+        self._placement = ()  # (x, y, tp) of every ship
+        self._synced = True  # ships and _ship_cells match the masks and _placement
+        self._ship_cells = {}  # (x, y) -> (ship, deck index)
         self._generate_ships()
 
     def __bool__(self):
-        return self._count_dead_ships == 10
+        return self.count_dead_ships == len(self._ships)
 
     @property
     def ships(self):
+        self._sync()
         return self._ships
 
     @property
@@ -162,187 +178,262 @@ class GamePole:
 
     @property
     def count_dead_ships(self):
-        return self._count_dead_ships
+        """Number of the rival's ships sunk by the owner of this field"""
+        return self.rival.ships_lost if self.rival is not None else 0
 
-    @count_dead_ships.setter
-    def count_dead_ships(self, value):
-        if isinstance(value, int):
-            self._count_dead_ships = value
+    @property
+    def ships_lost(self):
+        """Number of the ships of this field that were sunk"""
+        return self._ships_lost
 
     def _check_ships_around(self, length: int, head_coord: tuple, orientation: int) -> int:
-        """Method for checking the presence of ships around and at the installation site of the ship"""
-        indexes = (-1, 0), (1, 0), (0, 1), (0, -1), (-1, -1), (1, -1), (-1, 1), (1, 1), (0, 0)
-        head_x, head_y = head_coord
-        result = 0
-
-        if orientation == 1:  # horizontal
-            j = head_x
-            k = 0
-            while length > k:
-                result += sum(self._field[head_y + x][j + y] for x, y in indexes
-                              if 0 <= head_y + x < self._size and 0 <= j + y < self._size)
-                j += 1
-                k += 1
-
-        elif orientation == 2:  # vertical
-            i = head_y
-            k = 0
-            while length > k:
-                result += sum(self._field[i + x][head_x + y] for x, y in indexes
-                              if 0 <= i + x < self._size and 0 <= head_x + y < self._size)
-                i += 1
-                k += 1
-
-        return result
+        """Method for checking the presence of ships around and at the installation site of the ship.
+         Returns the number of decks in that zone"""
+        grid = self._grid
+        segment = grid.cover(grid.bit(*head_coord), length, orientation == Ship.HORIZONTAL)
+        return (grid.dilate(segment) & self._ships_mask).bit_count()
 
     def _generate_ships(self):
         """Method for creating ships with random orientation and no initial coordinates"""
-        self._ships = [Ship(4, tp=randint(1, 2)), Ship(3, tp=randint(1, 2)), Ship(3, tp=randint(1, 2)),
-                       Ship(2, tp=randint(1, 2)), Ship(2, tp=randint(1, 2)), Ship(2, tp=randint(1, 2)),
-                       Ship(1, tp=randint(1, 2)), Ship(1, tp=randint(1, 2)), Ship(1, tp=randint(1, 2)),
-                       Ship(1, tp=randint(1, 2))]
-
-    def init(self):
-        """Method for the initial initialization of the playing field"""
-        for ship in self._ships:
-            tp, length = ship.tp, ship.length
-            while True:
-                x, y = randint(0, self._size - 1), randint(0, self._size - 1)
-                if tp == ship.HORIZONTAL:
-                    if x + (length - 1) > self._size - 1:
-                        continue
-
-                    result = self._check_ships_around(length, (x, y), tp)
-
-                    if not result:
-                        k = 0
-                        for j in range(x, x + length):
-                            self._field[y][j] = ship[k]
-                            k += 1
-                    else:
-                        continue
-
-                elif tp == ship.VERTICAL:
-                    if y + (length - 1) > self._size - 1:
-                        continue
+        self._ships = [Ship(length, tp=self._rng.randint(1, 2)) for length in self._fleet]
+
+    def _index_ship(self, ship: Ship):
+        for deck, coord in enumerate(ship.get_cells()):
+            self._ship_cells[coord] = ship, deck
+
+    def _unindex_ship(self, ship: Ship):
+        for coord in ship.get_cells():
+            del self._ship_cells[coord]
+
+    def ship_at(self, coord: tuple) -> Union[tuple, None]:
+        """Method for getting (ship, deck index) located in the cell 'coord'"""
+        self._sync()
+        return self._ship_cells.get(coord)
+
+    def _place_fleet(self, attempts: int = 1000) -> list:
+        """Method for choosing a place for every ship: returns [(ship, x, y, horizontal)].
+        Every step samples uniformly from the bit mask of the placements still valid for the
+        next ship (cells outside the forbidden zone of the ships already placed); when no
+        placement is left, the previous ship is moved to another of its candidates.
+        A search that keeps backtracking is restarted, since random restarts escape
+        dead ends much faster than exhausting them"""
+        grid = self._grid
+        ships = sorted(self._ships, key=lambda ship: ship.length, reverse=True)
+        budget = 20 * len(ships)
+
+        for _ in range(attempts):
+            candidates = [None] * len(ships)  # [horizontal starts, vertical starts] per ship
+            forbidden_before = [0] * len(ships)
+            chosen = []
+            forbidden = 0
+            level = steps = 0
+
+            while 0 <= level < len(ships) and steps < budget:
+                steps += 1
+                length = ships[level].length
+                if candidates[level] is None:
+                    free = grid.full & ~forbidden
+                    candidates[level] = [grid.placements(free, length, True),
+                                         grid.placements(free, length, False) if length > 1 else 0]
+                    forbidden_before[level] = forbidden
+
+                horizontal_count = candidates[level][0].bit_count()
+                total = horizontal_count + candidates[level][1].bit_count()
+                if not total:
+                    candidates[level] = None
+                    level -= 1
+                    if chosen:
+                        chosen.pop()
+                        forbidden = forbidden_before[level]
+                    continue
 
-                    result = self._check_ships_around(length, (x, y), tp)
+                k = self._rng.randint(0, total - 1)
+                horizontal = k < horizontal_count
+                start = grid.nth_bit(candidates[level][0 if horizontal else 1],
+                                     k if horizontal else k - horizontal_count)
+                candidates[level][0 if horizontal else 1] ^= start
+                forbidden = forbidden_before[level] | grid.dilate(grid.cover(start, length, horizontal))
+                chosen.append((ships[level], *grid.coord(start), horizontal))
+                level += 1
+
+            if level == len(ships):
+                return chosen
+            if level < 0:
+                break
 
-                    if not result:
-                        k = 0
-                        for i in range(y, y + length):
-                            self._field[i][x] = ship[k]
-                            k += 1
-                    else:
-                        continue
+        raise ValueError('не удалось расставить корабли на поле')
 
-                ship.set_start_coords(x, y)
-                break
+    def init(self):
+        """Method for the initial initialization of the playing field"""
+        self._hits = self._misses = 0
+        self._synced = True
+        for ship, x, y, horizontal in self._place_fleet():
+            if ship.length > 1:
+                ship._tp = ship.HORIZONTAL if horizontal else ship.VERTICAL
+            ship.set_start_coords(x, y)
+        self.update_game_field()
 
     def get_ships(self) -> list:
         """Method for returning a list of ships on the field"""
-        return self._ships
+        return self.ships
 
     def update_game_field(self):
-        """Method for updating the playing field
-         after the movement of the ships and after each move"""
-        for i in range(self._size):
-            for j in range(self._size):
-                self._field[i][j] = 0
-
+        """Method for updating the bit masks of the playing field
+         from the ships after they were moved by hand"""
+        self._sync()
+        self._ships_mask = 0
+        self._ship_cells = {}
         for ship in self._ships:
-            x, y, length = ship.x, ship.y, ship.length
-            ship_part = 0
-
-            if ship.tp == ship.HORIZONTAL:
-                for j in range(x, x + length):
-                    self._field[y][j] = ship[ship_part]
-                    ship_part += 1
-            elif ship.tp == ship.VERTICAL:
-                for i in range(y, y + length):
-                    self._field[i][x] = ship[ship_part]
-                    ship_part += 1
+            self._ships_mask |= ship.mask(self._grid)
+            self._index_ship(ship)
+        self._placement = tuple((ship.x, ship.y, ship.tp) for ship in self._ships)
+        self._ships_lost = self._count_lost()
+
+    def mark_shot(self, coord: tuple) -> bool:
+        """Method for recording a shot at the cell 'coord'; returns True if it hit a deck"""
+        bit = self._grid.bit(*coord)
+        if self._ships_mask & bit:
+            if not self._hits & bit:
+                self._hits |= bit
+                deck = self.ship_at(coord)[0].mask(self._grid)
+                if self._hits & deck == deck:
+                    self._ships_lost += 1
+            return True
+        self._misses |= bit
+        return False
+
+    def snapshot(self) -> tuple:
+        """State of the field as a hashable tuple of integers, taken in O(1)"""
+        return self._ships_mask, self._hits, self._misses, self._placement
+
+    def restore(self, state: tuple):
+        """Method for returning the field to a snapshot;
+         ship objects are brought up to date on the next access"""
+        self._ships_mask, self._hits, self._misses, self._placement = state
+        self._ships_lost = self._count_lost()
+        self._synced = False
+
+    def _count_lost(self) -> int:
+        """Method for counting the sunk ships from the hits and the placement"""
+        grid = self._grid
+        lost = 0
+        for ship, (x, y, tp) in zip(self._ships, self._placement):
+            deck = grid.cover(grid.bit(x, y), ship.length, tp == Ship.HORIZONTAL)
+            if self._hits & deck == deck:
+                lost += 1
+        return lost
+
+    def _sync(self):
+        """Method for rebuilding the ships and the deck index from the masks after restore()"""
+        if self._synced:
+            return
+        self._synced = True
+        self._ship_cells = {}
+        for ship, (x, y, tp) in zip(self._ships, self._placement):
+            ship._tp = tp
+            ship.set_start_coords(x, y)
+            for deck, (i, j) in enumerate(ship.get_cells()):
+                ship._cells[deck] = 2 if self._hits & self._grid.bit(i, j) else 1
+            ship._is_move = all(deck == 1 for deck in ship._cells)
+            self._index_ship(ship)
 
     def move_ships(self):
-        """Method to move each ship one space"""
+        """Method to move each ship one space.
+         A ship may step forward or back if the new cells are outside the zones
+         (ship and the cells around it) of all other ships"""
+        self._sync()
+        grid = self._grid
         for ship in self._ships:
-            old_x, old_y = ship.get_start_coords()
-            directions = ['forward', 'back']
-            is_conflict = False
-            while directions or not is_conflict:
-                shuffle(directions)
-                direction = directions.pop()
-
-                x = y = 0
-                if direction == 'forward' and ship.tp == ship.HORIZONTAL and ship.is_move:
-                    x = ship.x + 1
-                    y = ship.y
-                elif direction == 'back' and ship.tp == ship.HORIZONTAL and ship.is_move:
-                    x = ship.x - 1
-                    y = ship.y
-                elif direction == 'forward' and ship.tp == ship.VERTICAL and ship.is_move:
-                    x = ship.x
-                    y = ship.y + 1
-                elif direction == 'back' and ship.tp == ship.VERTICAL and ship.is_move:
-                    x = ship.x
-                    y = ship.y - 1
-                else:
+            if not ship.is_move:
+                continue
+            own = ship.mask(grid)
+            forbidden = grid.dilate(self._ships_mask ^ own)
+            step = grid.step(ship.tp == ship.HORIZONTAL)
+
+            directions = [1, -1]
+            self._rng.shuffle(directions)
+            for go in directions:
+                moved = own << step if go == 1 else own >> step
+                if (moved & grid.full & ~forbidden).bit_count() == ship.length:
+                    self._unindex_ship(ship)
+                    ship.move(go)
+                    self._index_ship(ship)
+                    self._ships_mask = self._ships_mask & ~own | moved
                     break
 
-                try:
-                    ship.set_start_coords(x, y)
-                except TypeError:
-                    continue
-
-                if ship.is_out_pole(self._size):
-                    ship.set_start_coords(old_x, old_y)
-                    continue
-
-                for curr_ship in self._ships:
-                    if curr_ship != ship:
-                        if not ship.is_collide(curr_ship):
-                            continue
-                        else:
-                            ship.set_start_coords(old_x, old_y)
-                            is_conflict = True
-                            break
-                if is_conflict:
-                    continue
-                break
-
-        self.update_game_field()
+        self._placement = tuple((ship.x, ship.y, ship.tp) for ship in self._ships)
 
     def show(self):
         """Method for displaying the playing field in the console"""
-        print(f'{self.name:^{self._size * 2}}')
-        print(' '.join(chr(i) for i in range(97, 97 + self._size)))
-        print('-' * (self._size * 2 - 1))
-
-        for i, row in enumerate(self._field, 1):
-            print(f'{" ".join(str(s) for s in row)}  {i}')
-        print('_' * (self._size * 2 - 1))
-        print()
+        self.renderer.draw(self, [f'{self.name:^{self._size * 2}}'] + _board_lines(self.get_pole()))
 
     def get_pole(self) -> tuple:
-        """Method for getting the current playing field"""
-        return tuple(tuple(row) for row in self._field)
+        """Method for getting the current playing field: 1 - whole deck, 2 - hit deck"""
+        grid, ships, hits = self._grid, self._ships_mask, self._hits
+        return tuple(tuple(2 if hits >> (y * grid.stride + x) & 1 else ships >> (y * grid.stride + x) & 1
+                           for x in range(self._size)) for y in range(self._size))
 
     def __repr__(self) -> str:
         return f'Размер поля - {self._size} x {self._size}'
 
 
+def _board_lines(rows) -> list:
+    """Lines of a board frame: column letters, the rows with their numbers, separators"""
+    size = len(rows)
+    lines = [' '.join(chr(i) for i in range(97, 97 + size)), '-' * (size * 2 - 1)]
+    lines.extend(f'{" ".join(str(s) for s in row)}  {i}' for i, row in enumerate(rows, 1))
+    lines.extend(('_' * (size * 2 - 1), ''))
+    return lines
+
+
+class CellPool:
+    """Set of free cells with O(1) random sampling and removal"""
+
+    def __init__(self, cells, rng: Random = None):
+        self._rng = rng or Random()
+        self._cells = list(cells)
+        self._index = {cell: i for i, cell in enumerate(self._cells)}
+
+    def __len__(self):
+        return len(self._cells)
+
+    def __contains__(self, cell):
+        return cell in self._index
+
+    def discard(self, cell: tuple):
+        """Method for removing a cell: the last cell takes its place in the list"""
+        i = self._index.pop(cell, None)
+        if i is None:
+            return
+        last = self._cells.pop()
+        if i < len(self._cells):
+            self._cells[i] = last
+            self._index[last] = i
+
+    def pop_random(self) -> tuple:
+        cell = self._cells[self._rng.randint(0, len(self._cells) - 1)]
+        self.discard(cell)
+        return cell
+
+
 class SeaBattle:
     """Class for setting up and running the gameplay"""
     _x_coord_translate = {'a': 1, 'b': 2, 'c': 3, 'd': 4, 'e': 5, 'f': 6, 'g': 7, 'h': 8, 'i': 9, 'j': 10}
-    _comp_ships_coord = {}
-    _human_ships_coord = {}
 
-    def __init__(self, size_field, name_1: str = 'Computer', name_2: str = 'Human'):
+    def __init__(self, size_field, name_1: str = 'Computer', name_2: str = 'Human', fleet: tuple = GamePole.FLEET,
+                 strategy=None, rng: Random = None, renderer: Renderer = None, replay: ReplayWriter = None):
         self._size_field = size_field
-        self.computer, self.human = GamePole(size_field), GamePole(size_field)
+        self.strategy = strategy  # object with choose() and report(coord, hit, sunk_cells); None - random shots
+        self.replay = replay  # ReplayWriter from open_replay(), None - games are not recorded
+        self._rng = rng = rng or Random()
+        self.renderer = renderer if renderer is not None else Renderer()
+        self.computer = GamePole(size_field, fleet, rng, self.renderer)
+        self.human = GamePole(size_field, fleet, rng, self.renderer)
         self.computer.name, self.human.name = name_1, name_2
-        self._hit_points_comp = []
-        self._hit_points_human = []
+        self.computer.rival, self.human.rival = self.human, self.computer
+        self._hit_points_comp = set()
+        self._hit_points_human = set()
+        self._free_cells_comp = CellPool(((x, y) for y in range(size_field) for x in range(size_field)), rng)
         self.result_field = [['-'] * self._size_field for _ in range(self._size_field)]
 
     def init(self):
@@ -350,8 +441,8 @@ class SeaBattle:
          The method produces the placement of ships on the fields of rivals"""
         self.computer.init()
         self.human.init()
-        self._comp_ships_coord = self.get_all_ships_parts_coord(self.computer)
-        self._human_ships_coord = self.get_all_ships_parts_coord(self.human)
+        if self.replay is not None:
+            self.replay.begin(self.replay_state(), self.replay_state)
 
     @staticmethod
     def get_all_ships_parts_coord(field: GamePole) -> dict:
@@ -369,8 +460,8 @@ class SeaBattle:
 
     def recognize_shell_place(self, shell_coord: tuple, gamer: GamePole) -> Union[Ship, None]:
         """Method for recognizing the location of a projectile impact"""
-        ships = self._comp_ships_coord if gamer is self.human else self._human_ships_coord
-        place = list(filter(lambda x: shell_coord in ships[x], ships))
+        target = self.computer if gamer is self.human else self.human
+        place = target.ship_at(shell_coord)
         return place[0] if place else None
 
     def human_go(self):
@@ -378,55 +469,109 @@ class SeaBattle:
         x = y = None
         while True:
             try:
-                coord = input('Введите координаты поля для выстрела в формате \'a1\': ')
+                coord = self.renderer.input('Введите координаты поля для выстрела в формате \'a1\': ')
                 x, y = coord[0], str(coord[1:])
             except (TypeError, IndexError, ValueError):
-                print('Введен не верный тип и/или диапазон координат')
+                self.renderer.write('Введен не верный тип и/или диапазон координат\n')
                 continue
             else:
                 if coord[0].lower() in [chr(let) for let in range(97, 97 + self._size_field)] and \
                         coord[1] in [str(d) for d in range(1, self._size_field + 1)]:
                     x, y = self._x_coord_translate.get(x) - 1, int(y) - 1
                     if (x, y) in self._hit_points_human:
-                        print('Координаты уже использовались')
+                        self.renderer.write('Координаты уже использовались\n')
                         continue
                     break
                 continue
 
-        shell_place = self.recognize_shell_place((x, y), self.human)
-        self._hit_points_human.append((x, y))
-
-        if shell_place is not None:
-            self._marked_broken_ship_part(self.human, shell_place, (x, y))
-            self.computer.update_game_field()
+        if self.shoot(self.human, (x, y)) is not None:
             self.show_shot_location(x, y, 'X')
         else:
             self.show_shot_location(x, y, '*')
 
+    def shoot(self, gamer: GamePole, coord: tuple) -> Union[Ship, None]:
+        """Method for firing a shot of 'gamer' at the rival's field without any output.
+         Returns the ship that was hit or None for a miss.
+         A cell can be shot only once, otherwise a sunk ship would be counted again"""
+        target = self.computer if gamer is self.human else self.human
+        hit_points = self._hit_points_human if gamer is self.human else self._hit_points_comp
+        if coord in hit_points:
+            raise ValueError('по этой клетке уже стреляли')
+        shell_place = self.recognize_shell_place(coord, gamer)
+        hit_points.add(coord)
+        if gamer is self.computer:
+            self._free_cells_comp.discard(coord)
+
+        if shell_place is not None:
+            self._marked_broken_ship_part(gamer, shell_place, coord)
+        target.mark_shot(coord)
+
+        if self.replay is not None:
+            result = 0 if shell_place is None else 1 if shell_place else 2
+            self.replay.move(_shot_record.pack(gamer is self.human, *coord, result))
+            if not self:
+                self.replay.end(bytes((self.is_human_win,)))
+        return shell_place
+
+    def replay_state(self) -> bytes:
+        """Method for packing the size, the fleet and both fields into bytes.
+         Moves of the ships by move_ships() are not logged"""
+        fleet = self.computer._fleet
+        n = _mask_bytes(self._size_field)
+        data = bytearray((self._size_field, len(fleet), *fleet))
+        for pole in (self.computer, self.human):
+            ships, hits, misses, placement = pole.snapshot()
+            for mask in (ships, hits, misses):
+                data += mask.to_bytes(n, 'little')
+            for x, y, tp in placement:
+                data += bytes((x, y, tp))
+        return bytes(data)
+
+    def restore_state(self, state: bytes):
+        """Method for returning both fields and the shot history to a state from replay_state()"""
+        n = _mask_bytes(self._size_field)
+        k = state[1]
+        position = 2 + k
+        for pole in (self.computer, self.human):
+            ships, hits, misses = (int.from_bytes(state[position + i * n:position + (i + 1) * n], 'little')
+                                   for i in range(3))
+            position += 3 * n
+            placement = tuple(tuple(state[position + 3 * i:position + 3 + 3 * i]) for i in range(k))
+            position += 3 * k
+            pole.restore((ships, hits, misses, placement))
+        self._restore_shots()
+
+    def _restore_shots(self):
+        """Method for rebuilding the shot history and the shot field from the fields"""
+        grid = self.computer._grid
+        self._hit_points_human = set(grid.coords(self.computer._hits | self.computer._misses))
+        self._hit_points_comp = set(grid.coords(self.human._hits | self.human._misses))
+        self._free_cells_comp = CellPool(((x, y) for y in range(self._size_field) for x in range(self._size_field)
+                                          if (x, y) not in self._hit_points_comp), self._rng)
+        self.result_field = [['-'] * self._size_field for _ in range(self._size_field)]
+        for mask, state_mark in ((self.computer._hits, 'X'), (self.computer._misses, '*')):
+            for x, y in grid.coords(mask):
+                self.result_field[y][x] = state_mark
+
     def _marked_broken_ship_part(self, gamer: GamePole, shell_place: Ship, coord_place: tuple):
         """The method implements a search for a damaged ship deck and marks it as destroyed"""
-        ships_coord = self._human_ships_coord if gamer is self.computer else self._comp_ships_coord
-        part_num = ships_coord.get(shell_place).index(coord_place)
+        target = self.human if gamer is self.computer else self.computer
+        part_num = target.ship_at(coord_place)[1]
         shell_place[part_num] = 2
         shell_place.is_move = False
-        if not shell_place:
-            gamer.count_dead_ships += 1
 
     def computer_go(self):
         """Method to implement computer move
-          randomly into free cells"""
-        while True:
-            x, y = randint(0, self._size_field - 1), randint(0, self._size_field - 1)
-            if (x, y) in self._hit_points_comp:
-                continue
-            break
-
-        shell_place = self.recognize_shell_place((x, y), self.computer)
-        self._hit_points_comp.append((x, y))
+          randomly into free cells or into the cell chosen by the strategy"""
+        if self.strategy is not None:
+            x, y = self.strategy.choose()
+        else:
+            x, y = self._free_cells_comp.pop_random()
 
-        if shell_place is not None:
-            self._marked_broken_ship_part(self.computer, shell_place, (x, y))
-            self.human.update_game_field()
+        shell_place = self.shoot(self.computer, (x, y))
+        if self.strategy is not None:
+            sunk = shell_place.get_cells() if shell_place is not None and not shell_place else None
+            self.strategy.report((x, y), shell_place is not None, sunk)
         self.human.show()
 
     def show_shot_location(self, x: int, y: int, state: str):
@@ -434,16 +579,43 @@ class SeaBattle:
          The field is displayed only after the person's move; X - there was a hit in the ship;
          * - shot past"""
         self.result_field[y][x] = state
+        self.renderer.draw((self, 'shots'), _board_lines(self.result_field))
 
-        print(' '.join(chr(i) for i in range(97, 97 + self._size_field)))
-        print('-' * (self._size_field * 2 - 1))
+    @property
+    def is_human_win(self) -> bool:
+        return bool(self.human)
 
-        for i, row in enumerate(self.result_field, 1):
-            print(f'{" ".join(str(s) for s in row)}  {i}')
-        print('_' * (self._size_field * 2 - 1))
-        print()
+    @property
+    def is_computer_win(self) -> bool:
+        return bool(self.computer)
 
     def __bool__(self):
         """The method determines the end of the battle.
-         If someone has destroyed all 10 ships, the game stops"""
-        return not self.human and not self.computer
\ No newline at end of file
+         If someone has destroyed all the ships, the game stops"""
+        return not self.human and not self.computer
+
+
+def _mask_bytes(size: int) -> int:
+    """Bytes of a field bit mask: size rows of size + 1 bits"""
+    return (size * (size + 1) + 7) // 8
+
+
+def open_replay(path, size: int = 10, fleet: tuple = GamePole.FLEET, checkpoint_every: int = 32) -> ReplayWriter:
+    """Log for games with this field size and fleet; pass it as 'replay' to record them"""
+    state_size = 2 + len(fleet) + 2 * (3 * _mask_bytes(size) + 3 * len(fleet))
+    return ReplayWriter(path, b'SEA1', _shot_record.size, state_size, checkpoint_every)
+
+
+def load_replay(log: ReplayLog, game: int, turn: int = None) -> SeaBattle:
+    """The battle of a logged game after 'turn' shots (the final position by default)"""
+    if turn is None:
+        turn = log.move_count(game)
+    state, moves = log.seek(game, turn)
+    battle = SeaBattle(state[0], fleet=tuple(state[2:2 + state[1]]))
+    battle.restore_state(state)
+    for move in moves:
+        shooter, x, y, _ = _shot_record.unpack(move)
+        battle.shoot(battle.human if shooter else battle.computer, (x, y))
+    if moves:
+        battle._restore_shots()
+    return battle
@@ -0,0 +1,64 @@
+class BitGrid:
+    """Bit layout of a size x size board
+
+    Cell (x, y) is bit y * stride + x with stride = size + 1. The extra column is
+    always empty, so shifting a mask by one cell never wraps onto the next row"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.stride = size + 1
+        self.full = sum(((1 << size) - 1) << (y * self.stride) for y in range(size))
+
+    def bit(self, x: int, y: int) -> int:
+        return 1 << (y * self.stride + x)
+
+    def coord(self, bit: int) -> tuple:
+        """Coordinates (x, y) of a single-bit mask"""
+        y, x = divmod(bit.bit_length() - 1, self.stride)
+        return x, y
+
+    def coords(self, mask: int) -> list:
+        result = []
+        while mask:
+            low = mask & -mask
+            result.append(self.coord(low))
+            mask ^= low
+        return result
+
+    def mask(self, cells) -> int:
+        result = 0
+        for x, y in cells:
+            result |= self.bit(x, y)
+        return result
+
+    def dilate(self, mask: int) -> int:
+        """The mask together with all 8 neighbours of its cells"""
+        mask |= mask << 1 | mask >> 1
+        mask |= mask << self.stride | mask >> self.stride
+        return mask & self.full
+
+    def step(self, horizontal: bool) -> int:
+        return 1 if horizontal else self.stride
+
+    def placements(self, free: int, length: int, horizontal: bool) -> int:
+        """Bits of the first cells of every 'length' long segment lying entirely in 'free'"""
+        step = self.step(horizontal)
+        result = free
+        for k in range(1, length):
+            result &= free >> (k * step)
+        return result
+
+    def cover(self, starts: int, length: int, horizontal: bool) -> int:
+        """Cells of the segments starting at 'starts'"""
+        step = self.step(horizontal)
+        result = 0
+        for k in range(length):
+            result |= starts << (k * step)
+        return result
+
+    @staticmethod
+    def nth_bit(mask: int, n: int) -> int:
+        """The n-th (from zero, lowest first) set bit of the mask"""
+        for _ in range(n):
+            mask &= mask - 1
+        return mask & -mask
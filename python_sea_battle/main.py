@@ -1,7 +1,8 @@
 from Game import *
+from strategies import TargetingStrategy
 
 if __name__ == '__main__':
-    game = SeaBattle(10)
+    game = SeaBattle(10, strategy=TargetingStrategy(10, GamePole.FLEET))
     game.init()
     step_game = 0
     while game:
@@ -0,0 +1,105 @@
+from random import Random
+
+from Game import CellPool
+from bitboard import BitGrid
+
+
+class RandomStrategy:
+    """Uniformly random cell among those not shot yet"""
+
+    def __init__(self, size: int, fleet: tuple, rng: Random = None):
+        self._free = CellPool(((x, y) for y in range(size) for x in range(size)), rng)
+
+    def report(self, coord: tuple, hit: bool, sunk_cells: list = None):
+        pass
+
+    def choose(self) -> tuple:
+        return self._free.pop_random()
+
+
+class TargetingStrategy:
+    """Hunt/target opponent driven by a placement-probability heatmap
+
+    Every cell is scored by the number of legal positions of the ships still afloat
+    that cover it, given the misses, the hits and the sunk ships. While there are hits
+    of an unfinished ship only positions through those hits count (target mode).
+    The heatmap is a bit-sliced counter: plane j holds bit j of every cell's count,
+    so whole-board masks are added with a few big-int operations instead of per-cell loops"""
+
+    def __init__(self, size: int, fleet: tuple, rng: Random = None):
+        self._grid = BitGrid(size)
+        self._rng = rng or Random()
+        self._afloat = {}  # length -> number of such ships afloat
+        for length in fleet:
+            self._afloat[length] = self._afloat.get(length, 0) + 1
+        self._misses = 0
+        self._hits = 0  # hits of ships not sunk yet
+        self._sunk = 0
+
+    def report(self, coord: tuple, hit: bool, sunk_cells: list = None):
+        """Method for telling the strategy the result of its shot;
+        sunk_cells - all cells of the ship if the shot sank it"""
+        bit = self._grid.bit(*coord)
+        if not hit:
+            self._misses |= bit
+        elif sunk_cells is None:
+            self._hits |= bit
+        else:
+            ship = self._grid.mask(sunk_cells)
+            self._hits &= ~ship
+            self._sunk |= ship
+            self._afloat[len(sunk_cells)] -= 1
+
+    def heatmap(self) -> list:
+        """Bit planes of the placement count of every cell"""
+        grid = self._grid
+        hits = self._hits
+        diagonal = hits << 1 | hits >> 1
+        diagonal = (diagonal << grid.stride | diagonal >> grid.stride) & grid.full
+        allowed = grid.full & ~(self._misses | grid.dilate(self._sunk) | diagonal)
+
+        planes = []
+        for length, count in self._afloat.items():
+            if not count:
+                continue
+            for horizontal in (True, False) if length > 1 else (True,):
+                starts = grid.placements(allowed, length, horizontal)
+                if hits:
+                    starts &= _through(grid, hits, length, horizontal)
+                step = grid.step(horizontal)
+                for k in range(length):
+                    _add(planes, starts << (k * step), count)
+        return planes
+
+    def choose(self) -> tuple:
+        grid = self._grid
+        candidates = grid.full & ~(self._misses | self._hits | self._sunk)
+        best = candidates
+        for plane in reversed(self.heatmap()):
+            if best & plane:
+                best &= plane
+        return grid.coord(grid.nth_bit(best, self._rng.randrange(bin(best).count('1'))))
+
+
+def _through(grid: BitGrid, hits: int, length: int, horizontal: bool) -> int:
+    """Starts of the segments of 'length' that contain at least one of the hits"""
+    step = grid.step(horizontal)
+    result = 0
+    for k in range(length):
+        result |= hits >> (k * step)
+    return result
+
+
+def _add(planes: list, mask: int, weight: int = 1):
+    """Adds 'weight' to the counter of every cell in the mask (ripple carry over the bit planes)"""
+    j = 0
+    while weight:
+        if weight & 1:
+            carry, i = mask, j
+            while carry:
+                while i >= len(planes):
+                    planes.append(0)
+                planes[i], carry = planes[i] ^ carry, planes[i] & carry
+                i += 1
+        weight >>= 1
+        j += 1
@@ -0,0 +1,126 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from random import Random
+from time import perf_counter
+
+from Game import GamePole, SeaBattle
+from renderer import NullRenderer
+from strategies import RandomStrategy, TargetingStrategy
+
+CHUNK = 500  # games per job, so the results for a seed do not depend on 'processes'
+BUCKETS = 10000  # latency histogram: 1 microsecond buckets, the last one collects everything slower
+
+
+def play_game(first, second, size: int = 10, fleet: tuple = GamePole.FLEET, rng: Random = None,
+              latency: tuple = None) -> tuple:
+    """Plays one silent game, 'first' shoots first; both players are strategies with choose() and report().
+    Returns (winner, shots of the winner), winner is 0 for 'first' and 1 for 'second'.
+    If 'latency' is given, the time of every choose() is added to latency[player] histogram"""
+    game = SeaBattle(size, fleet=fleet, rng=rng, renderer=NullRenderer())
+    game.init()
+    players = ((game.computer, first), (game.human, second))
+    shots = [0, 0]
+    turn = 0
+    while game:
+        gamer, strategy = players[turn]
+        started = perf_counter()
+        coord = strategy.choose()
+        if latency is not None:
+            latency[turn][min(BUCKETS - 1, int((perf_counter() - started) * 1e6))] += 1
+
+        shell_place = game.shoot(gamer, coord)
+        sunk = shell_place.get_cells() if shell_place is not None and not shell_place else None
+        strategy.report(coord, shell_place is not None, sunk)
+        shots[turn] += 1
+        turn ^= 1
+
+    winner = 0 if game.is_computer_win else 1
+    return winner, shots[winner]
+
+
+def _play_chunk(job) -> tuple:
+    """Plays a chunk of games, the players swap the first move every game"""
+    games, a_factory, b_factory, size, fleet, seed = job
+    rng = Random(seed)
+    wins, shots = [0, 0], [0, 0]
+    latency = ([0] * BUCKETS, [0] * BUCKETS)
+    for i in range(games):
+        a = a_factory(size, fleet, rng=Random(rng.getrandbits(64)))
+        b = b_factory(size, fleet, rng=Random(rng.getrandbits(64)))
+        swap = i % 2
+        winner, winner_shots = play_game(*((b, a) if swap else (a, b)), size, fleet,
+                                         Random(rng.getrandbits(64)), latency[::-1] if swap else latency)
+        winner ^= swap
+        wins[winner] += 1
+        shots[winner] += winner_shots
+    return wins, shots, latency
+
+
+def _percentile(histogram: list, p: int) -> float:
+    """Upper bound in milliseconds of the bucket holding the p-th percentile"""
+    rank = sum(histogram) * p / 100
+    total = 0
+    for micros, count in enumerate(histogram):
+        total += count
+        if count and total >= rank:
+            return (micros + 1) / 1000
+    return None
+
+
+def _stats(wins, shots, latency, seconds) -> dict:
+    games = sum(wins)
+    result = {'games': games, 'seconds': seconds}
+    for player, name in enumerate('ab'):
+        moves = sum(latency[player])
+        result[name] = {'wins': wins[player], 'win_rate': wins[player] / games if games else 0,
+                        'avg_shots_to_win': shots[player] / wins[player] if wins[player] else None,
+                        'moves': moves,
+                        'latency_ms': {f'p{p}': _percentile(latency[player], p) for p in (50, 90, 99)}}
+    return result
+
+
+def tournament(games: int, a_factory=TargetingStrategy, b_factory=RandomStrategy, size: int = 10,
+               fleet: tuple = GamePole.FLEET, seed: int = None, processes: int = 1) -> dict:
+    """Runs 'games' silent games between two strategies and returns win rates, average shots
+    to win and per-move latency percentiles of each.
+
+    a_factory/b_factory build a strategy from (size, fleet, rng=...) - a strategy class or a partial;
+    with processes != 1 the games are split into chunks over a process pool"""
+    started = perf_counter()
+    master = Random(seed)
+    jobs = [(min(CHUNK, games - start), a_factory, b_factory, size, fleet, master.getrandbits(64))
+            for start in range(0, games, CHUNK)]
+
+    if processes == 1:
+        results = list(map(_play_chunk, jobs))
+    else:
+        with ProcessPoolExecutor(processes) as pool:
+            results = list(pool.map(_play_chunk, jobs))
+
+    wins, shots = [0, 0], [0, 0]
+    latency = ([0] * BUCKETS, [0] * BUCKETS)
+    for chunk_wins, chunk_shots, chunk_latency in results:
+        for player in (0, 1):
+            wins[player] += chunk_wins[player]
+            shots[player] += chunk_shots[player]
+            histogram = latency[player]
+            for micros, count in enumerate(chunk_latency[player]):
+                if count:
+                    histogram[micros] += count
+
+    return _stats(wins, shots, latency, perf_counter() - started)
+
+
+if __name__ == '__main__':
+    strategies = {'random': RandomStrategy, 'targeting': TargetingStrategy}
+    parser = argparse.ArgumentParser(description='Турнир стратегий морского боя без вывода на экран')
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--a', choices=strategies, default='targeting')
+    parser.add_argument('--b', choices=strategies, default='random')
+    parser.add_argument('--size', type=int, default=10)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--processes', type=int, default=1)
+    args = parser.parse_args()
+
+    print(tournament(args.games, strategies[args.a], strategies[args.b], args.size, GamePole.FLEET,
+                     args.seed, args.processes))